@@ -1,18 +1,29 @@
 """
 Data Extraction Agent: Executes SQL queries against DuckDB and returns results.
 """
+from typing import Callable
+
 import duckdb
-import pandas as pd
+import pyarrow as pa
 from data.loader import execute_query
 
 
-def run_query(sql: str) -> tuple[pd.DataFrame, str | None]:
+def run_query(
+    sql: str,
+    conn: duckdb.DuckDBPyConnection | None = None,
+    question: str | None = None,
+    cursor_factory: Callable[[], duckdb.DuckDBPyConnection] | None = None,
+) -> tuple[pa.Table, str | None]:
     """
-    Execute a SQL query.
-    Returns (DataFrame, error_message). If successful, error_message is None.
+    Execute a SQL query, optionally on a dedicated cursor.
+    The question is recorded alongside the query if it lands in the slow-query log,
+    which profiles it on a cursor from `cursor_factory`.
+    Returns (Arrow table, error_message). If successful, error_message is None.
     """
     try:
-        df = execute_query(sql)
-        return df, None
+        table = execute_query(
+            sql, conn=conn, question=question, as_arrow=True, cursor_factory=cursor_factory
+        )
+        return table, None
     except (duckdb.Error, ValueError) as e:
-        return pd.DataFrame(), str(e)
+        return pa.table({}), str(e)
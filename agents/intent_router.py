@@ -0,0 +1,251 @@
+"""
+Intent Router: Answers common question shapes with templated SQL, bypassing the LLM.
+Handles "top N <dimension> by <metric>", "total <metric> for <filter>" and
+"how many orders were <status>" by matching the question against the semantic catalog.
+Questions it can't fully account for fall back to the Query Resolution Agent.
+"""
+import re
+import time
+from dataclasses import dataclass, field
+
+from config import MAX_RESULT_ROWS, ROUTER_MAX_FILTER_VALUES
+from data.catalog import DIMENSIONS, METRICS, Dimension, Metric
+from data.loader import execute_query, get_table_stats
+from monitoring.metrics import metrics, rate
+
+
+# Words that carry no meaning for routing; anything else left unmatched lowers confidence.
+_STOPWORDS = {
+    "a", "all", "an", "and", "are", "by", "did", "do", "does", "each", "for", "from",
+    "give", "had", "has", "have", "how", "in", "is", "list", "many", "me", "much",
+    "number", "of", "on", "or", "our", "overall", "per", "product", "products", "show",
+    "tell", "the", "to", "total", "was", "we", "were", "what", "which", "who", "with",
+    "level", "levels", "top", "bottom", "highest", "most", "best", "largest", "biggest",
+    "lowest", "least", "worst", "smallest",
+}
+_ASCENDING_WORDS = {"bottom", "lowest", "least", "worst", "smallest"}
+_RANKING_WORDS = {"top", "highest", "most", "best", "largest", "biggest"} | _ASCENDING_WORDS
+_NUMBER_WORDS = {
+    "three": 3, "five": 5, "ten": 10, "fifteen": 15, "twenty": 20,
+}
+_LIMIT_PATTERN = re.compile(
+    rf"\b(?:{'|'.join(sorted(_RANKING_WORDS))})\s+(\d+|{'|'.join(_NUMBER_WORDS)})\b"
+)
+# "shipped to X" names a destination, not the "Shipped" order status.
+_DESTINATION_PATTERN = re.compile(r"\b(?:shipped|delivered|sent)\s+to\b")
+_DEFAULT_RANK_LIMIT = 10
+# Contractions: "what's" → "what", "don't" → "do not", so they leave no stray "s"/"t" token.
+_CONTRACTION_PATTERN = re.compile(r"(?<=[a-z])['’](s|re|ve|ll|d|m)\b")
+_NEGATION_PATTERN = re.compile(r"n['’]t\b")
+
+_value_cache: dict[tuple[str, str], dict[str, str]] = {}
+
+
+@dataclass
+class RoutedQuery:
+    """Templated SQL for a recognised question, with the router's confidence in it."""
+
+    sql: str
+    confidence: float
+    metric: str
+    dimension: str | None = None
+    filters: dict[str, list[str]] = field(default_factory=dict)
+
+
+def _normalize(text: str) -> str:
+    """Lowercase and reduce to space-separated alphanumeric tokens, padded with spaces."""
+    text = _NEGATION_PATTERN.sub(" not", text.lower())
+    text = _CONTRACTION_PATTERN.sub("", text)
+    return " " + " ".join(re.findall(r"[a-z0-9]+", text)) + " "
+
+
+def _content_tokens(text: str) -> list[str]:
+    return [t for t in text.split() if t not in _STOPWORDS]
+
+
+def _consume(text: str, phrase: str) -> tuple[str, bool]:
+    """Remove every whole-word occurrence of `phrase` from `text`."""
+    pattern = f" {phrase} "
+    if pattern not in text:
+        return text, False
+    while pattern in text:
+        text = text.replace(pattern, " ")
+    return text, True
+
+
+def _match_metric(text: str) -> tuple[str, Metric | None]:
+    """Find the metric with the longest matching synonym, among metrics whose table is loaded."""
+    loaded = get_table_stats()
+    candidates = sorted(
+        ((syn, m) for m in METRICS if m.table in loaded for syn in m.synonyms),
+        key=lambda pair: len(pair[0]),
+        reverse=True,
+    )
+    for synonym, metric in candidates:
+        text, found = _consume(text, synonym)
+        if found:
+            for other in metric.synonyms:
+                text, _ = _consume(text, other)
+            return text, metric
+    return text, None
+
+
+def _match_dimension(text: str, table: str) -> tuple[str, Dimension | None]:
+    """Find a dimension available on `table` by its longest matching synonym."""
+    candidates = sorted(
+        ((syn, d) for d in DIMENSIONS if table in d.columns for syn in d.synonyms),
+        key=lambda pair: len(pair[0]),
+        reverse=True,
+    )
+    for synonym, dimension in candidates:
+        text, found = _consume(text, synonym)
+        if found:
+            return text, dimension
+    return text, None
+
+
+def _dimension_values(table: str, column: str) -> dict[str, str]:
+    """
+    Return {normalized value: lowercased raw value} for a low-cardinality column.
+    Cached per column; columns above ROUTER_MAX_FILTER_VALUES are treated as unfilterable.
+    """
+    key = (table, column)
+    if key not in _value_cache:
+        df = execute_query(
+            f"SELECT DISTINCT CAST({column} AS VARCHAR) AS v FROM {table} "
+            f"WHERE {column} IS NOT NULL LIMIT {ROUTER_MAX_FILTER_VALUES + 1}"
+        )
+        values: dict[str, str] = {}
+        if len(df) <= ROUTER_MAX_FILTER_VALUES:
+            for raw in df["v"]:
+                normalized = _normalize(raw).strip()
+                # Skip values that collide with routing vocabulary (e.g. the "Top" category)
+                # or are too short to match reliably (e.g. the "S" size).
+                if len(normalized) >= 2 and normalized not in _STOPWORDS:
+                    values[normalized] = str(raw).lower()
+        _value_cache[key] = values
+    return _value_cache[key]
+
+
+def _match_filters(text: str, table: str) -> tuple[str, dict[str, list[str]]]:
+    """Find dimension values mentioned in the question, as {column: [values]}."""
+    filters: dict[str, list[str]] = {}
+    candidates = sorted(
+        (
+            (normalized, raw, d.columns[table])
+            for d in DIMENSIONS
+            if d.filterable and table in d.columns
+            for normalized, raw in _dimension_values(table, d.columns[table]).items()
+        ),
+        key=lambda triple: len(triple[0]),
+        reverse=True,
+    )
+    for normalized, raw, column in candidates:
+        text, found = _consume(text, normalized)
+        if found:
+            filters.setdefault(column, []).append(raw)
+    return text, filters
+
+
+def _quote(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _build_sql(
+    metric: Metric,
+    group_column: str | None,
+    filters: dict[str, list[str]],
+    limit: int | None,
+    ascending: bool,
+) -> str:
+    """Render the templated SQL for a matched question."""
+    conditions = []
+    for column, values in filters.items():
+        if len(values) == 1:
+            conditions.append(f"LOWER({column}) = {_quote(values[0])}")
+        else:
+            conditions.append(f"LOWER({column}) IN ({', '.join(_quote(v) for v in values)})")
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    if group_column is None:
+        return f"SELECT {metric.expression} AS {metric.alias} FROM {metric.table}{where};"
+    order = "ASC" if ascending else "DESC"
+    return (
+        f"SELECT {group_column}, {metric.expression} AS {metric.alias} "
+        f"FROM {metric.table}{where} "
+        f"GROUP BY {group_column} ORDER BY {metric.alias} {order} "
+        f"LIMIT {limit or MAX_RESULT_ROWS};"
+    )
+
+
+def route_question(question: str) -> RoutedQuery | None:
+    """
+    Match a question against the catalog and return templated SQL, or None if no
+    metric is recognised. Confidence is the share of content words the match accounts for.
+    """
+    text = _DESTINATION_PATTERN.sub(" to ", _normalize(question))
+    tokens = set(text.split())
+    original = _content_tokens(text)
+
+    limit = None
+    limit_match = _LIMIT_PATTERN.search(text)
+    if limit_match:
+        value = limit_match.group(1)
+        limit = int(value) if value.isdigit() else _NUMBER_WORDS[value]
+        text = text.replace(limit_match.group(0), " ")
+    elif tokens & _RANKING_WORDS:
+        limit = _DEFAULT_RANK_LIMIT
+
+    text, metric = _match_metric(text)
+    if metric is None:
+        return None
+    text, dimension = _match_dimension(text, metric.table)
+    text, filters = _match_filters(text, metric.table)
+
+    group_column = dimension.columns[metric.table] if dimension else None
+    if group_column in filters:
+        # "orders in category Set": the dimension word qualifies the filter, not a grouping.
+        group_column = None
+
+    leftover = _content_tokens(text)
+    recognised = len(original) - len(leftover)
+    confidence = recognised / (recognised + len(leftover)) if recognised else 0.0
+
+    sql = _build_sql(metric, group_column, filters, limit, ascending=bool(tokens & _ASCENDING_WORDS))
+    return RoutedQuery(
+        sql=sql,
+        confidence=confidence,
+        metric=metric.name,
+        dimension=dimension.name if group_column else None,
+        filters=filters,
+    )
+
+
+def try_route(question: str, min_confidence: float) -> RoutedQuery | None:
+    """
+    Route a question if the template match is confident enough.
+    Records the routing hit rate and decision latency.
+    """
+    start = time.perf_counter()
+    try:
+        routed = route_question(question)
+    except ValueError as e:
+        print(f"[router] Routing failed, falling back to the LLM: {e}")
+        routed = None
+    hit = routed is not None and routed.confidence >= min_confidence
+    metrics.observe("router.latency", time.perf_counter() - start)
+    metrics.incr("router.attempts")
+    if hit:
+        metrics.incr("router.hits")
+    return routed if hit else None
+
+
+def router_stats() -> dict[str, float]:
+    """Return routing hit rate, decision latency and end-to-end latency per route."""
+    return {
+        "attempts": metrics.counter("router.attempts"),
+        "hit_rate": rate("router.hits", "router.attempts"),
+        "decision_p50_ms": metrics.latency("router.latency")["p50_ms"],
+        "template_pipeline_p50_ms": metrics.latency("pipeline.latency.template")["p50_ms"],
+        "llm_pipeline_p50_ms": metrics.latency("pipeline.latency.llm")["p50_ms"],
+    }
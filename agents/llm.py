@@ -0,0 +1,148 @@
+"""
+Shared LLM client factory for the agents.
+Clients are cached per temperature and model tier so setup is paid once per process,
+and can be paid ahead of time by the warm-up stage. With MODEL_ROUTING, the "fast"
+and "strong" tiers map to different models (see agents/model_router.py).
+
+A cassette layer can sit beneath the clients: it records prompt → response pairs
+to disk keyed by a hash of the prompt, and replays them (optionally with simulated
+latency) so the pipeline can run offline and deterministically.
+"""
+import hashlib
+import json
+import time
+from functools import lru_cache
+from pathlib import Path
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+from agents.local_llm import LocalChatModel
+from config import (
+    GOOGLE_API_KEY,
+    GEMINI_MODEL,
+    LLM_BACKEND,
+    LLM_CASSETTE_DIR,
+    LLM_CASSETTE_LATENCY,
+    LLM_CASSETTE_MODE,
+    MODEL_ROUTING,
+    MODEL_TIERS,
+)
+from monitoring.metrics import metrics, timed
+
+
+def _model_name(tier: str) -> str:
+    if LLM_BACKEND == "local":
+        return f"local-{tier}"
+    return MODEL_TIERS.get(tier, GEMINI_MODEL) if MODEL_ROUTING else GEMINI_MODEL
+
+
+def _create_client(tier: str, temperature: float) -> ChatGoogleGenerativeAI | LocalChatModel:
+    """Build the backend chat model for a tier."""
+    if LLM_BACKEND == "local":
+        return LocalChatModel(tier, temperature)
+    return ChatGoogleGenerativeAI(
+        model=_model_name(tier),
+        google_api_key=GOOGLE_API_KEY,
+        temperature=temperature,
+    )
+
+
+class CassetteMissError(LookupError):
+    """Raised in strict mode when a prompt has no recorded response."""
+
+
+class CassetteLLM:
+    """
+    Wraps a chat model with record/replay of its responses.
+
+    Modes: "record" always calls the model and saves the response; "replay" serves
+    recorded responses and records misses from the live model; "strict" serves
+    recorded responses only and raises CassetteMissError on a miss.
+    """
+
+    def __init__(self, tier: str, temperature: float, mode: str, directory: Path):
+        self.tier = tier
+        self.model = _model_name(tier)
+        self.temperature = temperature
+        self.mode = mode
+        self.directory = Path(directory)
+        self._live: ChatGoogleGenerativeAI | LocalChatModel | None = None
+
+    def _key(self, prompt: str) -> str:
+        payload = json.dumps(
+            {"model": self.model, "temperature": self.temperature, "prompt": prompt},
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def _live_model(self) -> ChatGoogleGenerativeAI | LocalChatModel:
+        if self._live is None:
+            self._live = _create_client(self.tier, self.temperature)
+        return self._live
+
+    def _replay(self, entry: dict) -> AIMessage:
+        if LLM_CASSETTE_LATENCY == "recorded":
+            time.sleep(entry.get("latency_s", 0))
+        elif float(LLM_CASSETTE_LATENCY) > 0:
+            time.sleep(float(LLM_CASSETTE_LATENCY) / 1000)
+        return AIMessage(content=entry["response"])
+
+    def _record(self, key: str, prompt: str, messages: list[BaseMessage]) -> AIMessage:
+        start = time.perf_counter()
+        response = self._live_model().invoke(messages)
+        entry = {
+            "model": self.model,
+            "temperature": self.temperature,
+            "prompt": prompt,
+            "response": response.content,
+            "latency_s": round(time.perf_counter() - start, 4),
+            "recorded_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename so concurrent readers never see a partial file
+        tmp = self._path(key).with_suffix(".tmp")
+        tmp.write_text(json.dumps(entry, ensure_ascii=False, indent=2), encoding="utf-8")
+        tmp.replace(self._path(key))
+        metrics.incr("cassette.recorded")
+        return AIMessage(content=response.content)
+
+    def invoke(self, messages: list[BaseMessage]) -> AIMessage:
+        """Return the recorded response for these messages, or record a live one."""
+        prompt = "\n\n".join(str(m.content) for m in messages)
+        key = self._key(prompt)
+        path = self._path(key)
+
+        if self.mode != "record" and path.exists():
+            metrics.incr("cassette.hits")
+            return self._replay(json.loads(path.read_text(encoding="utf-8")))
+
+        metrics.incr("cassette.misses")
+        if self.mode == "strict":
+            raise CassetteMissError(
+                f"No cassette recorded for prompt {key[:12]} in {self.directory} "
+                f"(model={self.model}, temperature={self.temperature}). "
+                f"Prompt starts: {prompt[:200]!r}"
+            )
+        return self._record(key, prompt, messages)
+
+
+@lru_cache(maxsize=None)
+def get_llm(
+    temperature: float = 0, tier: str = "strong"
+) -> ChatGoogleGenerativeAI | LocalChatModel | CassetteLLM:
+    """Return the cached chat client for a temperature and model tier, behind the cassette if enabled."""
+    if LLM_CASSETTE_MODE != "off":
+        return CassetteLLM(tier, temperature, LLM_CASSETTE_MODE, LLM_CASSETTE_DIR)
+    return _create_client(tier, temperature)
+
+
+def invoke_llm(prompt: str, temperature: float = 0, tier: str = "strong") -> str:
+    """Send a single-message prompt to the tier's model, recording calls and latency per tier."""
+    metrics.incr(f"llm.calls.{tier}")
+    with timed(f"llm.latency.{tier}"):
+        response = get_llm(temperature, tier).invoke([HumanMessage(content=prompt)])
+    return response.content
@@ -0,0 +1,42 @@
+"""
+Local stand-in for the Gemini chat models, selected with LLM_BACKEND = "local".
+Answers SQL prompts with the template router (or CANNOT_ANSWER) and summary prompts
+with the result digest they carry, after a simulated per-tier latency. No network or
+API key is needed, so routing, retries and the pipeline can be exercised offline.
+"""
+import re
+import time
+
+from langchain_core.messages import AIMessage, BaseMessage
+
+from agents.intent_router import route_question
+from config import LOCAL_LLM_LATENCY_S
+
+_CANNOT_ANSWER_SQL = "SELECT 'CANNOT_ANSWER' AS reason"
+_QUESTION = re.compile(r"## User Question\n(.*?)\n\nSQL Query:", flags=re.DOTALL)
+_SECTION = re.compile(r"## (?:Query Results[^\n]*|Sales Data Summary)\n(.*?)\n\n## ", flags=re.DOTALL)
+
+
+class LocalChatModel:
+    """Deterministic chat model with the `invoke` interface the agents use."""
+
+    def __init__(self, tier: str, temperature: float = 0):
+        self.tier = tier
+        self.temperature = temperature
+
+    def _respond(self, prompt: str) -> str:
+        question = _QUESTION.search(prompt)
+        if question is not None:
+            routed = route_question(question.group(1).strip())
+            return routed.sql if routed is not None else _CANNOT_ANSWER_SQL
+        if prompt.rstrip().endswith("Fixed SQL Query:"):
+            return _CANNOT_ANSWER_SQL
+        section = _SECTION.search(prompt)
+        body = section.group(1).strip() if section else prompt.strip()
+        return f"[local {self.tier} model]\n\n{body[:1500]}"
+
+    def invoke(self, messages: list[BaseMessage]) -> AIMessage:
+        """Return a canned response for the prompt after the tier's simulated latency."""
+        time.sleep(LOCAL_LLM_LATENCY_S.get(self.tier, 0))
+        prompt = "\n\n".join(str(m.content) for m in messages)
+        return AIMessage(content=self._respond(prompt))
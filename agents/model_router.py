@@ -0,0 +1,106 @@
+"""
+Adaptive model routing: scores how complex a question (and its result) is and picks
+the model tier for each LLM call. Simple lookups go to the fast model; questions that
+span tables, compare, trend or ask for narrative go to the strong one, as do retries
+after a validation failure.
+"""
+import re
+
+import pandas as pd
+
+from agents.summary_agent import wants_narrative
+from config import MODEL_ROUTING, MODEL_ROUTING_THRESHOLD, RULES_MAX_ROWS
+from data.catalog import METRICS
+from monitoring.metrics import metrics, rate
+
+FAST, STRONG = "fast", "strong"
+
+# Keywords pointing at tables beyond the catalog metrics (pricing and P&L sheets).
+_TABLE_HINTS = {
+    "may_2022": ("mrp", "price", "pricing", "catalog"),
+    "pl_march_2021": ("p&l", "profit", "margin", "march 2021"),
+    "cloud_warehouse": ("warehouse", "shiprocket", "increff"),
+    "expense": ("expense", "expenses", "spend"),
+}
+# Analytic operations and their weight; time series weigh more because dates are stored as text.
+_ANALYTIC_PATTERNS = [
+    (re.compile(r"\b(compare|comparison|versus|vs\.?|against|relative to)\b"), 1),
+    (re.compile(r"\b(trend|over time|growth|grew|decline|monthly|weekly|month[- ]over[- ]month|by month)\b"), 2),
+    (re.compile(r"\b(ratio|percentage|percent|share|proportion|rate|average|median|correlat\w*)\b"), 1),
+    (re.compile(r"\b(each|per|within|among|across)\b.*\b(top|highest|lowest|best|worst)\b"), 1),
+]
+
+
+def _tables_touched(question: str) -> set[str]:
+    """
+    Tables a question mentions. Metric synonyms are consumed longest first, so
+    "international revenue" counts once rather than also as plain "revenue".
+    """
+    tables = set()
+    synonyms = sorted(
+        ((syn, m.table) for m in METRICS for syn in m.synonyms),
+        key=lambda pair: len(pair[0]),
+        reverse=True,
+    )
+    for synonym, table in synonyms:
+        question, found = re.subn(rf"\b{re.escape(synonym)}\b", " ", question)
+        if found:
+            tables.add(table)
+    for table, hints in _TABLE_HINTS.items():
+        if any(re.search(rf"(?<!\w){re.escape(h)}(?!\w)", question) for h in hints):
+            tables.add(table)
+    return tables
+
+
+def question_complexity(question: str) -> int:
+    """
+    Score a question: +2 for touching several tables, +1 per kind of analytic operation
+    (comparison, ratio, per-group ranking; +2 for time series), +2 for narrative,
+    +1 for long questions.
+    """
+    text = question.lower()
+    score = 2 if len(_tables_touched(text)) > 1 else 0
+    score += sum(weight for pattern, weight in _ANALYTIC_PATTERNS if pattern.search(text))
+    score += 2 if wants_narrative(text) else 0
+    score += 1 if len(text.split()) > 20 else 0
+    return score
+
+
+def classify_question(question: str) -> str:
+    """Model tier for generating SQL for a question."""
+    if not MODEL_ROUTING:
+        return STRONG
+    return STRONG if question_complexity(question) >= MODEL_ROUTING_THRESHOLD else FAST
+
+
+def summary_tier(question_tier: str, df: pd.DataFrame) -> str:
+    """Model tier for summarizing a result: strong for complex questions or wide/long results."""
+    if question_tier == STRONG or not MODEL_ROUTING:
+        return STRONG
+    numeric = sum(pd.api.types.is_numeric_dtype(df[c]) for c in df.columns)
+    if len(df) > RULES_MAX_ROWS or len(df.columns) > 3 or numeric > 1:
+        return STRONG
+    return FAST
+
+
+def record_route_outcome(tier: str, is_valid: bool) -> None:
+    """Count a validated SQL attempt against the tier that generated it."""
+    metrics.incr(f"model_route.{tier}.attempts")
+    if is_valid:
+        metrics.incr(f"model_route.{tier}.valid")
+
+
+def model_routing_stats() -> dict[str, float]:
+    """
+    Return per-tier success rates and routing shares.
+    fast_share: share of SQL attempts generated by the fast model.
+    escalation_rate: share of fast-model attempts that failed validation and were escalated.
+    """
+    fast = metrics.counter(f"model_route.{FAST}.attempts")
+    strong = metrics.counter(f"model_route.{STRONG}.attempts")
+    return {
+        "fast_share": fast / (fast + strong) if fast + strong else 0.0,
+        "fast_success_rate": rate(f"model_route.{FAST}.valid", f"model_route.{FAST}.attempts"),
+        "strong_success_rate": rate(f"model_route.{STRONG}.valid", f"model_route.{STRONG}.attempts"),
+        "escalation_rate": rate("model_route.escalations", f"model_route.{FAST}.attempts"),
+    }
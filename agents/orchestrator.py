@@ -2,16 +2,29 @@
 Orchestrator Agent: LangGraph-based multi-agent pipeline.
 Defines the state graph connecting all agents.
 """
+import time
 from typing import TypedDict
-import pandas as pd
+import pyarrow as pa
 from langgraph.graph import StateGraph, END
 
 from agents.query_agent import generate_sql, retry_sql
 from agents.data_agent import run_query
 from agents.validation_agent import validate_results
 from agents.summary_agent import generate_insight
+from agents.speculative import race_sql_candidates
+from agents.intent_router import try_route
+from agents.model_router import STRONG, classify_question, record_route_outcome, summary_tier
+from data.result_store import (
+    describe_result,
+    get_result,
+    put_result,
+    release_result,
+    result_frame,
+)
+from data.session_results import open_session_cursor
+from monitoring.metrics import metrics, timed
 from prompts.summary_prompt import OUT_OF_SCOPE_RESPONSE
-from config import MAX_RETRIES
+from config import MAX_RETRIES, SPECULATIVE_CANDIDATES, ROUTER_ENABLED, ROUTER_MIN_CONFIDENCE
 
 
 # ─── State Definition ─────────────────────────────────────────────────────────
@@ -21,56 +34,126 @@ class AgentState(TypedDict):
 
     question: str
     history: str
+    session_id: str  # Chat session whose previous result is queryable as `last_result`
     sql: str
-    result_df: pd.DataFrame
+    # Results live in the Arrow result store; state carries only the handle and metadata
+    result_handle: str
+    result_rows: int
+    result_schema: dict[str, str]
     error: str | None
     is_valid: bool
     validation_reason: str
     final_answer: str
     retry_count: int
+    route: str  # "template" when the intent router produced the SQL, else "llm"
+    model_tier: str  # Model tier that generated the SQL: "fast" or "strong" (escalates on retry)
 
 
 # ─── Node Functions ────────────────────────────────────────────────────────────
 
+def _store_result(state: AgentState, table: pa.Table) -> dict:
+    """Put a result in the store, freeing the one from any earlier attempt."""
+    release_result(state.get("result_handle"))
+    return {"result_handle": put_result(table), **describe_result(table)}
+
+
+def intent_router_node(state: AgentState) -> AgentState:
+    """Template fast path: emit SQL directly for common question shapes."""
+    routed = try_route(state["question"], ROUTER_MIN_CONFIDENCE) if ROUTER_ENABLED else None
+    if routed is None:
+        return {**state, "route": "llm"}
+    return {**state, "sql": routed.sql, "route": "template"}
+
+
 def query_resolution_node(state: AgentState) -> AgentState:
     """NL → SQL: Generate or retry SQL based on state."""
-    if state.get("retry_count", 0) > 0 and state.get("sql"):
-        # Retry with error context
+    if state.get("route") == "template":
+        # A template that failed validation is discarded; the strong model starts fresh.
+        tier = STRONG
+        sql = generate_sql(
+            question=state["question"],
+            history=state["history"],
+            session_id=state.get("session_id"),
+            tier=tier,
+        )
+    elif state.get("retry_count", 0) > 0 and state.get("sql"):
+        # Retry with error context, escalating to the strong model
+        tier = STRONG
+        if state.get("model_tier") != STRONG:
+            metrics.incr("model_route.escalations")
         sql = retry_sql(
             question=state["question"],
             previous_sql=state["sql"],
-            error=state.get("error", "Unknown error"),
+            error=state.get("error") or state.get("validation_reason") or "Unknown error",
+            session_id=state.get("session_id"),
+            tier=tier,
         )
     else:
+        tier = classify_question(state["question"])
         sql = generate_sql(
             question=state["question"],
             history=state["history"],
+            session_id=state.get("session_id"),
+            tier=tier,
         )
-    return {**state, "sql": sql}
+    return {**state, "sql": sql, "route": "llm", "model_tier": tier}
+
+
+def speculative_resolution_node(state: AgentState) -> AgentState:
+    """NL → SQL → results: race several SQL candidates and keep the first valid one."""
+    tier = classify_question(state["question"])
+    candidate = race_sql_candidates(
+        question=state["question"],
+        history=state["history"],
+        n=SPECULATIVE_CANDIDATES,
+        session_id=state.get("session_id"),
+        tier=tier,
+    )
+    return {
+        **state,
+        "model_tier": tier,
+        **_store_result(state, candidate.result),
+        "sql": candidate.sql,
+        "error": candidate.error,
+    }
 
 
 def data_extraction_node(state: AgentState) -> AgentState:
     """Execute SQL and capture results or errors."""
-    df, error = run_query(state["sql"])
-    return {**state, "result_df": df, "error": error}
+    session_id = state.get("session_id")
+    cursor = open_session_cursor(session_id)
+    try:
+        table, error = run_query(
+            state["sql"], conn=cursor, question=state["question"],
+            cursor_factory=lambda: open_session_cursor(session_id),
+        )
+    finally:
+        cursor.close()
+    return {**state, **_store_result(state, table), "error": error}
 
 
 def validation_node(state: AgentState) -> AgentState:
     """Validate results and decide if retry is needed."""
     is_valid, reason = validate_results(
-        df=state.get("result_df", pd.DataFrame()),
+        table=get_result(state.get("result_handle")) or pa.table({}),
         sql=state.get("sql", ""),
         error=state.get("error"),
     )
-    return {**state, "is_valid": is_valid, "validation_reason": reason}
+    retry_count = state.get("retry_count", 0) + (0 if is_valid else 1)
+    if state.get("route") == "llm" and reason != "out_of_scope":
+        record_route_outcome(state.get("model_tier", STRONG), is_valid)
+    return {**state, "is_valid": is_valid, "validation_reason": reason, "retry_count": retry_count}
 
 
 def summary_node(state: AgentState) -> AgentState:
     """Convert results into a business insight."""
+    df = result_frame(get_result(state["result_handle"]))
     answer = generate_insight(
         question=state["question"],
-        df=state["result_df"],
+        df=df,
         history=state["history"],
+        tier=summary_tier(classify_question(state["question"]), df),
+        sql=state.get("sql"),
     )
     return {**state, "final_answer": answer}
 
@@ -93,6 +176,11 @@ def error_node(state: AgentState) -> AgentState:
 
 # ─── Routing Logic ─────────────────────────────────────────────────────────────
 
+def route_after_intent(state: AgentState) -> str:
+    """Skip SQL generation when the intent router produced a template query."""
+    return "template" if state.get("route") == "template" else "llm"
+
+
 def route_after_validation(state: AgentState) -> str:
     """Decide next step after validation."""
     if state["is_valid"]:
@@ -106,20 +194,44 @@ def route_after_validation(state: AgentState) -> str:
 
 # ─── Graph Construction ────────────────────────────────────────────────────────
 
+def _timed_node(name: str, node):
+    """Wrap a node so its latency is recorded under `stage.<name>`."""
+    def wrapper(state: AgentState) -> AgentState:
+        with timed(f"stage.{name}"):
+            return node(state)
+    return wrapper
+
+
 def build_graph() -> StateGraph:
     """Construct and compile the LangGraph multi-agent state graph."""
     graph = StateGraph(AgentState)
 
     # Add nodes
-    graph.add_node("query_resolution", query_resolution_node)
-    graph.add_node("data_extraction", data_extraction_node)
-    graph.add_node("validation", validation_node)
-    graph.add_node("summary", summary_node)
-    graph.add_node("out_of_scope", out_of_scope_node)
-    graph.add_node("error", error_node)
-
-    # Entry point
-    graph.set_entry_point("query_resolution")
+    graph.add_node("intent_router", _timed_node("intent_router", intent_router_node))
+    graph.add_node("query_resolution", _timed_node("query_resolution", query_resolution_node))
+    graph.add_node("data_extraction", _timed_node("data_extraction", data_extraction_node))
+    graph.add_node("validation", _timed_node("validation", validation_node))
+    graph.add_node("summary", _timed_node("summary", summary_node))
+    graph.add_node("out_of_scope", _timed_node("out_of_scope", out_of_scope_node))
+    graph.add_node("error", _timed_node("error", error_node))
+
+    # Entry point: the intent router; on a miss, speculative mode races candidates
+    # on the first attempt. Retries always go through the sequential query_resolution path.
+    graph.set_entry_point("intent_router")
+    if SPECULATIVE_CANDIDATES > 1:
+        graph.add_node(
+            "speculative_resolution",
+            _timed_node("speculative_resolution", speculative_resolution_node),
+        )
+        graph.add_edge("speculative_resolution", "validation")
+        llm_entry = "speculative_resolution"
+    else:
+        llm_entry = "query_resolution"
+    graph.add_conditional_edges(
+        "intent_router",
+        route_after_intent,
+        {"template": "data_extraction", "llm": llm_entry},
+    )
 
     # Edges
     graph.add_edge("query_resolution", "data_extraction")
@@ -153,22 +265,34 @@ def get_graph():
     return _graph_cache[0]
 
 
-def run_qa_pipeline(question: str, history: str) -> dict:
+def run_qa_pipeline(question: str, history: str, session_id: str = "") -> dict:
     """
     Run the full Q&A multi-agent pipeline.
-    Returns the final state dict with 'final_answer' and 'sql'.
+    With a `session_id`, that session's previous result is available to follow-ups.
+    Returns the final state dict with 'final_answer' and 'sql'. The caller owns one
+    reference to the result behind 'result_handle' and should release it when done.
     """
     graph = get_graph()
     initial_state: AgentState = {
         "question": question,
         "history": history,
+        "session_id": session_id,
         "sql": "",
-        "result_df": pd.DataFrame(),
+        "result_handle": "",
+        "result_rows": 0,
+        "result_schema": {},
         "error": None,
         "is_valid": False,
         "validation_reason": "",
         "final_answer": "",
         "retry_count": 0,
+        "route": "",
+        "model_tier": "",
     }
+    start = time.perf_counter()
     final_state = graph.invoke(initial_state)
+    elapsed = time.perf_counter() - start
+    metrics.observe(f"pipeline.latency.{final_state['route']}", elapsed)
+    if final_state["model_tier"]:
+        metrics.observe(f"model_route.latency.{final_state['model_tier']}", elapsed)
     return final_state
@@ -3,19 +3,11 @@ Query Resolution Agent: Translates natural language questions into DuckDB SQL.
 Uses Gemini LLM with schema injection and few-shot examples.
 """
 import re
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.messages import HumanMessage
-from config import GOOGLE_API_KEY, GEMINI_MODEL, DATASETS
+from config import DATASETS
+from agents.llm import invoke_llm
 from data.loader import get_schema_info
-from prompts.query_prompt import QUERY_SYSTEM_PROMPT, QUERY_RETRY_PROMPT
-
-
-def _get_llm() -> ChatGoogleGenerativeAI:
-    return ChatGoogleGenerativeAI(
-        model=GEMINI_MODEL,
-        google_api_key=GOOGLE_API_KEY,
-        temperature=0,
-    )
+from data.session_results import LAST_RESULT_VIEW, get_last_result
+from prompts.query_prompt import LAST_RESULT_SECTION, QUERY_SYSTEM_PROMPT, QUERY_RETRY_PROMPT
 
 
 def _clean_sql(raw: str) -> str:
@@ -27,33 +19,60 @@ def _clean_sql(raw: str) -> str:
     return raw.strip()
 
 
-def generate_sql(question: str, history: str) -> str:
+def _last_result_section(session_id: str | None) -> str:
+    """Describe the session's previous result for the prompt, or '' if there is none."""
+    last = get_last_result(session_id)
+    if last is None:
+        return ""
+    return LAST_RESULT_SECTION.format(
+        question=last["question"],
+        sql=last["sql"],
+        rows=last["rows"],
+        columns=", ".join(f"{name} ({dtype})" for name, dtype in last["schema"].items()),
+    )
+
+
+def generate_sql(
+    question: str,
+    history: str,
+    temperature: float = 0,
+    session_id: str | None = None,
+    tier: str = "strong",
+) -> str:
     """
-    Generate a DuckDB SQL query from a natural language question.
+    Generate a DuckDB SQL query from a natural language question with the tier's model.
+    A non-zero temperature produces variant candidates for speculative mode.
+    The session's previous result, if any, is offered as the `last_result` table.
     Returns the SQL string.
     """
     schema = get_schema_info()
     prompt = QUERY_SYSTEM_PROMPT.format(
         schema=schema,
+        last_result=_last_result_section(session_id),
         history=history,
         question=question,
     )
-    llm = _get_llm()
-    response = llm.invoke([HumanMessage(content=prompt)])
-    return _clean_sql(response.content)
+    return _clean_sql(invoke_llm(prompt, temperature, tier))
 
 
-def retry_sql(question: str, previous_sql: str, error: str) -> str:
+def retry_sql(
+    question: str,
+    previous_sql: str,
+    error: str,
+    session_id: str | None = None,
+    tier: str = "strong",
+) -> str:
     """
     Retry SQL generation after a failure, providing the error context.
     """
-    table_names = ", ".join(DATASETS.keys())
+    tables = list(DATASETS.keys())
+    if get_last_result(session_id) is not None:
+        tables.append(LAST_RESULT_VIEW)
+    table_names = ", ".join(tables)
     prompt = QUERY_RETRY_PROMPT.format(
         question=question,
         error=error,
         previous_sql=previous_sql,
         table_names=table_names,
     )
-    llm = _get_llm()
-    response = llm.invoke([HumanMessage(content=prompt)])
-    return _clean_sql(response.content)
+    return _clean_sql(invoke_llm(prompt, tier=tier))
@@ -0,0 +1,161 @@
+"""
+Result digest for the summary prompt: compresses a query result into a columnar
+table plus precomputed totals, shares, ranks and deltas, under a token budget.
+Large results are shown as head/tail rows with aggregates over the full result.
+"""
+import math
+import numbers
+import re
+
+import pandas as pd
+
+from agents.summary_renderer import format_number, is_additive, select_expression
+from config import (
+    DIGEST_HEAD_ROWS,
+    DIGEST_MAX_CELL_CHARS,
+    DIGEST_TAIL_ROWS,
+    SUMMARY_TOKEN_BUDGET,
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)."""
+    return math.ceil(len(text) / 4)
+
+
+# Name tokens of numeric columns that label rows (periods, identifiers) rather than measure them.
+_KEY_TOKENS = {"year", "yr", "quarter", "month", "week", "day", "hour", "id", "code", "pincode"}
+_ORDER_BY = re.compile(r"\bORDER\s+BY\s+(.+?)(?:\bLIMIT\b|\bOFFSET\b|;|$)", flags=re.IGNORECASE | re.DOTALL)
+
+
+def _is_key(column: str) -> bool:
+    """True for numeric columns such as year, month or order_id that identify rows."""
+    return bool(set(re.findall(r"[a-z0-9]+", str(column).lower())) & _KEY_TOKENS)
+
+
+def _numeric_columns(df: pd.DataFrame) -> list[str]:
+    """Numeric measure columns, excluding booleans and period or id columns."""
+    return [
+        c for c in df.columns
+        if pd.api.types.is_numeric_dtype(df[c]) and not pd.api.types.is_bool_dtype(df[c])
+        and not _is_key(c)
+    ]
+
+
+def _order_by_column(df: pd.DataFrame, sql: str) -> str | None:
+    """The result column named (or numbered) first in the query's outermost ORDER BY."""
+    matches = list(_ORDER_BY.finditer(sql))
+    if not matches:
+        return None
+    term = matches[-1].group(1).split(",")[0].strip()
+    term = re.sub(r"\s+(ASC|DESC)\b.*$", "", term, flags=re.IGNORECASE | re.DOTALL).strip().strip('"')
+    if term.isdigit() and 0 < int(term) <= len(df.columns):
+        return df.columns[int(term) - 1]
+    return term if term in df.columns else None
+
+
+def _primary_metric(df: pd.DataFrame, numeric: list[str], sql: str | None) -> str:
+    """
+    The measure the result is about: the numeric column it is ordered by, else the
+    first one computed by an aggregate in the SQL, else the last numeric column.
+    """
+    if sql:
+        ordered = _order_by_column(df, sql)
+        if ordered in numeric:
+            return ordered
+        for column in numeric:
+            expression = select_expression(sql, column)
+            if expression is not None and "(" in expression:
+                return column
+    return numeric[-1]
+
+
+def _cell(value, plain: bool = False) -> str:
+    if pd.isna(value):
+        return ""
+    if isinstance(value, numbers.Number) and not isinstance(value, bool):
+        if plain:
+            return str(int(value)) if float(value).is_integer() else str(value)
+        return format_number(value)
+    text = str(value)
+    if len(text) > DIGEST_MAX_CELL_CHARS:
+        return text[: DIGEST_MAX_CELL_CHARS - 1] + "…"
+    return text
+
+
+def _enrich(df: pd.DataFrame, metric: str, sql: str | None) -> pd.DataFrame:
+    """Add share (additive measures only), rank and row-over-row delta columns for the primary metric."""
+    values = df[metric]
+    enriched = df.copy()
+    position = enriched.columns.get_loc(metric) + 1
+    total = values.sum()
+    if is_additive(metric, sql) and total > 0 and not (values < 0).any():
+        enriched.insert(position, f"{metric}_share_pct", (values / total * 100).round(1))
+        position += 1
+    enriched.insert(position, f"{metric}_rank", values.rank(ascending=False, method="min"))
+    enriched.insert(position + 1, f"{metric}_delta_vs_prev", values.diff())
+    return enriched
+
+
+def _aggregates(df: pd.DataFrame, numeric: list[str], sql: str | None) -> str:
+    """One line per column with full-result aggregates; totals only for additive measures."""
+    lines = ["Aggregates (over all rows):"]
+    for column in df.columns:
+        if column in numeric:
+            series = df[column]
+            total = f"total={format_number(series.sum())}, " if is_additive(column, sql) else ""
+            lines.append(
+                f"- {column}: {total}min={format_number(series.min())}, "
+                f"max={format_number(series.max())}, mean={format_number(series.mean())}"
+            )
+        else:
+            lines.append(f"- {column}: {df[column].nunique()} distinct values")
+    return "\n".join(lines)
+
+
+def _table(df: pd.DataFrame, head: int, tail: int) -> str:
+    """Pipe-delimited table with the header written once, eliding middle rows if needed."""
+    lines = [" | ".join(str(c) for c in df.columns)]
+    plain = [_is_key(c) for c in df.columns]
+
+    def add_rows(rows: pd.DataFrame) -> None:
+        for row in rows.itertuples(index=False):
+            lines.append(" | ".join(_cell(v, p) for v, p in zip(row, plain)))
+
+    if len(df) <= head + tail:
+        add_rows(df)
+    else:
+        add_rows(df.head(head))
+        lines.append(f"… {len(df) - head - tail} rows omitted …")
+        if tail:
+            add_rows(df.tail(tail))
+    return "\n".join(lines)
+
+
+def build_digest(
+    df: pd.DataFrame, token_budget: int = SUMMARY_TOKEN_BUDGET, sql: str | None = None
+) -> str:
+    """
+    Build the summary-prompt digest of a query result.
+    The SQL, if given, picks the primary measure (its ORDER BY or aggregate alias)
+    and tells which measures can be totalled.
+    The number of rows shown is halved until the digest fits `token_budget`.
+    """
+    if df.empty:
+        return "(no rows)"
+
+    numeric = _numeric_columns(df)
+    header = f"Rows: {len(df)} | Columns: {len(df.columns)}"
+    aggregates = _aggregates(df, numeric, sql) if len(df) > 1 else ""
+    if numeric and len(df) > 1:
+        enriched = _enrich(df, _primary_metric(df, numeric, sql), sql)
+    else:
+        enriched = df
+
+    head, tail = DIGEST_HEAD_ROWS, DIGEST_TAIL_ROWS
+    while True:
+        sections = [header, aggregates, "Rows:\n" + _table(enriched, head, tail)]
+        digest = "\n\n".join(s for s in sections if s)
+        if estimate_tokens(digest) <= token_budget or head <= 1:
+            return digest
+        head, tail = max(1, head // 2), tail // 2
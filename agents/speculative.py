@@ -0,0 +1,175 @@
+"""
+Speculative SQL resolution: races several SQL candidates and keeps the first valid one.
+Each candidate is generated at a different temperature, executed on its own DuckDB
+cursor and validated concurrently. Once a winner is found, candidates not yet started
+are cancelled and running queries are interrupted; an LLM call already in flight
+can't be interrupted and runs to completion, so it is counted as wasted.
+"""
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+
+import duckdb
+import pyarrow as pa
+
+from agents.data_agent import run_query
+from agents.query_agent import generate_sql
+from agents.validation_agent import validate_results
+from config import SPECULATIVE_TEMPERATURES
+from data.session_results import open_session_cursor
+from monitoring.metrics import metrics, rate
+
+
+@dataclass
+class Candidate:
+    """Outcome of one speculative SQL attempt."""
+
+    temperature: float
+    sql: str
+    result: pa.Table
+    error: str | None
+    is_valid: bool
+    validation_reason: str
+
+
+class _Race:
+    """Shared cancellation state for one speculative run."""
+
+    def __init__(self):
+        self.stop = threading.Event()
+        self.llm_calls = 0
+        self._lock = threading.Lock()
+        self._cursors: set[duckdb.DuckDBPyConnection] = set()
+
+    def begin_llm_call(self) -> bool:
+        """Count an LLM call about to start; False if the race is already over."""
+        with self._lock:
+            if self.stop.is_set():
+                return False
+            self.llm_calls += 1
+            return True
+
+    def track(self, cursor: duckdb.DuckDBPyConnection) -> None:
+        """Register a cursor that is executing a candidate query."""
+        with self._lock:
+            self._cursors.add(cursor)
+
+    def untrack(self, cursor: duckdb.DuckDBPyConnection) -> None:
+        """Forget a cursor once its query has finished."""
+        with self._lock:
+            self._cursors.discard(cursor)
+
+    def cancel(self) -> None:
+        """Stop pending candidates and interrupt queries still running (not in-flight LLM calls)."""
+        with self._lock:
+            self.stop.set()
+            for cursor in self._cursors:
+                cursor.interrupt()
+
+
+def _attempt(
+    race: _Race,
+    question: str,
+    history: str,
+    temperature: float,
+    session_id: str | None,
+    tier: str,
+) -> Candidate | None:
+    """Generate, execute and validate one candidate. Returns None if cancelled mid-way."""
+    if not race.begin_llm_call():
+        return None
+    sql = generate_sql(
+        question=question, history=history, temperature=temperature,
+        session_id=session_id, tier=tier,
+    )
+    if race.stop.is_set():
+        return None
+
+    cursor = open_session_cursor(session_id)
+    race.track(cursor)
+    try:
+        table, error = run_query(
+            sql, conn=cursor, question=question,
+            cursor_factory=lambda: open_session_cursor(session_id),
+        )
+    finally:
+        race.untrack(cursor)
+        cursor.close()
+    if race.stop.is_set():
+        return None
+
+    is_valid, reason = validate_results(table=table, sql=sql, error=error)
+    return Candidate(temperature, sql, table, error, is_valid, reason)
+
+
+def race_sql_candidates(
+    question: str, history: str, n: int, session_id: str | None = None, tier: str = "strong"
+) -> Candidate:
+    """
+    Run `n` SQL candidates concurrently and return the first valid one.
+    If none is valid, returns the lowest-temperature candidate so the normal
+    retry path can take over. Raises the last LLM error if every candidate fails.
+    Losing queries are interrupted, but losing LLM calls already started are not:
+    they finish in the background and are counted in `speculative.wasted`.
+    """
+    temperatures = [SPECULATIVE_TEMPERATURES[i % len(SPECULATIVE_TEMPERATURES)] for i in range(n)]
+    race = _Race()
+    executor = ThreadPoolExecutor(max_workers=n, thread_name_prefix="sql-candidate")
+    futures = {
+        executor.submit(_attempt, race, question, history, t, session_id, tier): t for t in temperatures
+    }
+
+    start = time.perf_counter()
+    winner: Candidate | None = None
+    finished: list[Candidate] = []
+    last_error: Exception | None = None
+    pending = set(futures)
+    try:
+        while pending and winner is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    candidate = future.result()
+                except Exception as e:  # noqa: BLE001 — one failed LLM call must not sink the race
+                    last_error = e
+                    metrics.incr("speculative.failed")
+                    continue
+                if candidate is None:
+                    continue
+                finished.append(candidate)
+                if candidate.is_valid and winner is None:
+                    winner = candidate
+    finally:
+        race.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    metrics.incr("speculative.runs")
+    metrics.incr("speculative.launched", n)
+    metrics.incr("speculative.llm_calls", race.llm_calls)
+    # Every model call made besides the one whose SQL is used, finished or not
+    metrics.incr("speculative.wasted", max(race.llm_calls - 1, 0))
+    metrics.observe("speculative.latency", time.perf_counter() - start)
+
+    if winner is not None:
+        metrics.incr("speculative.wins")
+        metrics.incr(f"speculative.wins.t{winner.temperature}")
+        return winner
+    if not finished:
+        raise last_error or RuntimeError("All speculative SQL candidates were cancelled.")
+    return min(finished, key=lambda c: c.temperature)
+
+
+def speculative_stats() -> dict[str, float]:
+    """
+    Return win and waste rates for speculative mode.
+    win_rate: share of runs where some candidate was valid on the first round.
+    waste_rate: share of launched candidates whose LLM call was made (even if still
+    in flight when the race ended) but whose SQL was not used.
+    """
+    return {
+        "runs": metrics.counter("speculative.runs"),
+        "win_rate": rate("speculative.wins", "speculative.runs"),
+        "waste_rate": rate("speculative.wasted", "speculative.launched"),
+        **{k.removeprefix("speculative."): v for k, v in metrics.counters("speculative.wins.").items()},
+    }
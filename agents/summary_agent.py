@@ -3,43 +3,63 @@ Summary Agent: Converts raw query results into human-readable business insights.
 Uses Gemini LLM with a business analyst persona.
 """
 import json
+import re
 import pandas as pd
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.messages import HumanMessage
-from config import GOOGLE_API_KEY, GEMINI_MODEL, MAX_RESULT_ROWS
+from config import SUMMARY_MODE
+from agents.llm import invoke_llm
+from agents.result_digest import build_digest
+from agents.summary_renderer import render_summary
+from monitoring.metrics import metrics, timed
 from prompts.summary_prompt import SUMMARY_SYSTEM_PROMPT, SUMMARIZATION_SYSTEM_PROMPT
 
+SUMMARY_TEMPERATURE = 0.3
 
-def _get_llm() -> ChatGoogleGenerativeAI:
-    return ChatGoogleGenerativeAI(
-        model=GEMINI_MODEL,
-        google_api_key=GOOGLE_API_KEY,
-        temperature=0.3,
-    )
+# Questions asking for interpretation rather than numbers always go to the LLM in "auto" mode,
+# and to the strong model when MODEL_ROUTING is on (see agents/model_router.py).
+_NARRATIVE_PATTERN = re.compile(
+    r"\b(why|explain|insights?|analy[sz]e|analysis|recommend\w*|narrative|summari[sz]e|story|strategy)\b",
+    flags=re.IGNORECASE,
+)
+
+
+def wants_narrative(question: str) -> bool:
+    """True if the question asks for interpretation rather than numbers."""
+    return bool(_NARRATIVE_PATTERN.search(question))
 
 
-def generate_insight(question: str, df: pd.DataFrame, history: str) -> str:
+def generate_insight(
+    question: str, df: pd.DataFrame, history: str, tier: str = "strong", sql: str | None = None
+) -> str:
     """
     Generate a business insight from query results.
+    Small results are rendered locally by rules unless SUMMARY_MODE or the
+    question calls for an LLM narrative; otherwise the tier's model writes it.
+    The SQL, if given, tells which measures are sums or counts and which are averages or rates.
     """
-    # Truncate large result sets
-    if len(df) > MAX_RESULT_ROWS:
-        df = df.head(MAX_RESULT_ROWS)
+    if SUMMARY_MODE == "rules" or (SUMMARY_MODE == "auto" and not wants_narrative(question)):
+        with timed("summary.latency.rules"):
+            rendered = render_summary(df, sql)
+        if rendered is not None:
+            metrics.incr("summary.rules")
+            return rendered
 
-    # Convert to JSON for prompt injection
-    try:
-        results_json = df.to_json(orient="records", default_handler=str)
-    except (ValueError, TypeError):
-        results_json = df.to_string()
+    metrics.incr("summary.llm")
+    with timed("summary.latency.llm"):
+        return _generate_llm_insight(question, df, history, tier, sql)
+
+
+def _generate_llm_insight(
+    question: str, df: pd.DataFrame, history: str, tier: str, sql: str | None
+) -> str:
+    """Generate a business insight with the LLM."""
+    results_digest = build_digest(df, sql=sql)
 
     prompt = SUMMARY_SYSTEM_PROMPT.format(
         history=history,
         question=question,
-        results=results_json,
+        results=results_digest,
     )
-    llm = _get_llm()
-    response = llm.invoke([HumanMessage(content=prompt)])
-    return response.content.strip()
+    return invoke_llm(prompt, SUMMARY_TEMPERATURE, tier).strip()
 
 
 def generate_full_summary(amazon_df: pd.DataFrame, intl_df: pd.DataFrame) -> str:
@@ -88,6 +108,4 @@ def generate_full_summary(amazon_df: pd.DataFrame, intl_df: pd.DataFrame) -> str
     data_summary = json.dumps(stats, indent=2, default=str)
     prompt = SUMMARIZATION_SYSTEM_PROMPT.format(data_summary=data_summary)
 
-    llm = _get_llm()
-    response = llm.invoke([HumanMessage(content=prompt)])
-    return response.content.strip()
+    return invoke_llm(prompt, SUMMARY_TEMPERATURE).strip()
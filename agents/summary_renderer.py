@@ -0,0 +1,146 @@
+"""
+Rule-based summary rendering for small results: scalars, ranked lists and
+two-column breakdowns. Produces formatted answers locally, with totals and shares
+for counts and sums, so the Summary Agent only calls the LLM for complex results.
+"""
+import re
+
+import pandas as pd
+
+from config import RULES_MAX_ROWS
+
+# Aggregates whose per-group values add up to a meaningful total, and those whose don't.
+_ADDITIVE_AGGREGATES = {"sum", "count"}
+_NON_ADDITIVE_AGGREGATES = {
+    "avg", "mean", "median", "min", "max", "quantile", "percentile_cont", "percentile_disc",
+    "mode", "stddev", "stddev_pop", "stddev_samp", "variance", "arg_max", "arg_min",
+}
+# Column-name tokens used when the SQL doesn't say how a measure was aggregated.
+_ADDITIVE_TOKENS = {
+    "count", "total", "sum", "num", "orders", "revenue", "sales", "amount", "amt",
+    "qty", "quantity", "units", "stock", "pcs",
+}
+_NON_ADDITIVE_TOKENS = {
+    "avg", "average", "mean", "median", "min", "max", "minimum", "maximum", "rate",
+    "ratio", "pct", "percent", "percentage", "share", "per", "aov", "margin", "price", "mrp",
+}
+_FUNCTION_CALL = re.compile(r"\b([a-z_]+)\s*\(")
+
+
+def _label(column: str) -> str:
+    """Turn a result column name into a readable label: 'total_sales' → 'Total sales'."""
+    return column.replace("_", " ").strip().capitalize()
+
+
+def _plural(column: str) -> str:
+    word = column.replace("_", " ").strip()
+    if word.endswith("y") and not word.endswith(("ay", "ey", "oy", "uy")):
+        return word[:-1] + "ies"
+    if word.endswith(("s", "x", "ch", "sh")):
+        return word + "es"
+    return word + "s"
+
+
+def format_number(value) -> str:
+    """Format a number with thousands separators; decimals only for small non-integers."""
+    if pd.isna(value):
+        return "N/A"
+    if float(value).is_integer():
+        return f"{int(value):,}"
+    if abs(value) >= 100:
+        return f"{value:,.0f}"
+    return f"{value:,.2f}"
+
+
+def select_expression(sql: str, column: str) -> str | None:
+    """The SELECT expression aliased as `column`, or None if the SQL doesn't alias it."""
+    match = re.search(rf'\bAS\s+"?{re.escape(column)}"?(?![\w"])', sql, flags=re.IGNORECASE)
+    if match is None:
+        return None
+    depth = 0
+    for start in range(match.start() - 1, -1, -1):
+        char = sql[start]
+        if char == ")":
+            depth += 1
+        elif char == "(":
+            if depth == 0:
+                break
+            depth -= 1
+        elif char == "," and depth == 0:
+            break
+    else:
+        start = -1
+    expression = sql[start + 1:match.start()]
+    return re.sub(r"^\s*SELECT\s+(DISTINCT\s+)?", "", expression, flags=re.IGNORECASE)
+
+
+def is_additive(column: str, sql: str | None = None) -> bool:
+    """
+    True if a measure's values can be summed across rows: counts and sums, not
+    averages, rates, percentages, medians or min/max. Read from the column's
+    aggregate in the SQL when it is aliased there, else from the column name.
+    """
+    expression = select_expression(sql, column) if sql else None
+    if expression is not None:
+        functions = set(_FUNCTION_CALL.findall(expression.lower()))
+        if functions & _NON_ADDITIVE_AGGREGATES or "/" in expression:
+            return False
+        if functions & _ADDITIVE_AGGREGATES:
+            return True
+    tokens = set(re.findall(r"[a-z0-9]+", column.lower()))
+    return bool(tokens & _ADDITIVE_TOKENS) and not tokens & _NON_ADDITIVE_TOKENS
+
+
+def _render_scalar(df: pd.DataFrame) -> str:
+    column = df.columns[0]
+    return f"**{_label(column)}:** {format_number(df.iloc[0, 0])}"
+
+
+def _render_breakdown(df: pd.DataFrame, label_col: str, value_col: str, additive: bool) -> str:
+    labels = df[label_col].astype(str).where(df[label_col].notna(), "(blank)")
+    values = pd.to_numeric(df[value_col], errors="coerce")
+    total = values.sum()
+    with_shares = additive and total > 0 and not (values < 0).any()
+    ranked = values.is_monotonic_decreasing or values.is_monotonic_increasing
+    metric = _label(value_col).lower()
+
+    if len(df) == 1:
+        return f"**{labels.iloc[0]}** — {metric}: **{format_number(values.iloc[0])}**"
+
+    top_idx = values.idxmax()
+    lead = f"**{labels[top_idx]}** leads with {metric} of **{format_number(values[top_idx])}**"
+    if with_shares:
+        lead += f" ({values[top_idx] / total:.1%} of the listed total)"
+    lines = [lead + "."]
+    lines.append("")
+    for position, (label, value) in enumerate(zip(labels, values), start=1):
+        bullet = f"{position}." if ranked else "-"
+        share = f" ({value / total:.1%})" if with_shares else ""
+        lines.append(f"{bullet} {label}: {format_number(value)}{share}")
+    if additive:
+        lines.append("")
+        lines.append(
+            f"**Total across {len(df)} {_plural(label_col)}:** {format_number(total)}"
+        )
+    return "\n".join(lines)
+
+
+def render_summary(df: pd.DataFrame, sql: str | None = None) -> str | None:
+    """
+    Render a deterministic answer for scalar, top-k or two-column breakdown results.
+    Shares and totals are added only for additive measures (see `is_additive`).
+    Returns None when the result is too complex for rules and needs the LLM.
+    """
+    if df.empty or len(df) > RULES_MAX_ROWS:
+        return None
+
+    numeric = [c for c in df.columns if pd.api.types.is_numeric_dtype(df[c])]
+    if df.shape == (1, 1) and numeric:
+        return _render_scalar(df)
+    if df.shape[1] == 2 and len(numeric) == 1:
+        value_col = numeric[0]
+        if df[value_col].notna().sum() == 0:
+            return None
+        label_col = next(c for c in df.columns if c != value_col)
+        return _render_breakdown(df, label_col, value_col, is_additive(value_col, sql))
+    return None
@@ -1,16 +1,124 @@
 """
 Validation Agent: Checks query results for validity and relevance.
 Triggers retry if results are empty, contain errors, or are clearly wrong.
+Plausibility checks run on Arrow data against aggregates precomputed by the loader,
+so implausible results are caught without an LLM call.
 """
-import pandas as pd
+import re
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from config import PLAUSIBILITY_TOLERANCE
+from data.loader import get_table_stats
 
 
 CANNOT_ANSWER_MARKER = "CANNOT_ANSWER"
 
+# Column-name tokens used to decide which precomputed bound applies to a result column.
+_COUNT_HINTS = {"count", "counts", "orders", "num", "transactions"}
+_METRIC_HINTS = {
+    "revenue": {"amount", "amt", "revenue", "sales"},
+    "quantity": {"qty", "pcs", "quantity", "stock", "units"},
+}
+# Columns whose values legitimately accumulate across rows (only checked per value).
+_CUMULATIVE_HINTS = {"cumulative", "running"}
+# SQL that adds subtotal or grand-total rows, so columns legitimately sum past the table total.
+_SUBTOTAL_SQL = re.compile(r"\b(ROLLUP|CUBE|GROUPING\s+SETS|UNION)\b", flags=re.IGNORECASE)
+_TOTAL_LABEL = re.compile(r"^\s*(grand\s+)?(sub)?totals?\s*$", flags=re.IGNORECASE)
+
+
+def _referenced_tables(sql: str, stats: dict[str, dict]) -> list[str]:
+    """Return the loaded tables mentioned in the SQL."""
+    return [t for t in stats if re.search(rf"\b{re.escape(t)}\b", sql, flags=re.IGNORECASE)]
+
+
+def _name_tokens(name: str) -> set[str]:
+    """Split a column name into lowercase word tokens (total_discount → {total, discount})."""
+    return set(re.findall(r"[a-z0-9]+", name.lower()))
+
+
+def _column_bound(name: str, tables: list[str], stats: dict[str, dict]) -> float | None:
+    """Return the upper bound for a result column based on its name, or None if unknown."""
+    tokens = _name_tokens(name)
+    if tokens & _COUNT_HINTS:
+        return float(sum(stats[t]["row_count"] for t in tables))
+    for kind, hints in _METRIC_HINTS.items():
+        if tokens & hints:
+            totals = [stats[t]["totals"][kind] for t in tables if kind in stats[t]["totals"]]
+            return float(sum(totals)) if totals else None
+    return None
+
+
+def _all_null(column: pa.ChunkedArray) -> bool:
+    """True if every value is null (or NaN, for floating-point columns)."""
+    if column.null_count == len(column):
+        return True
+    if pa.types.is_floating(column.type):
+        return pc.all(pc.or_kleene(pc.is_null(column), pc.is_nan(column))).as_py()
+    return False
+
+
+def _has_total_rows(table: pa.Table, sql: str) -> bool:
+    """True if the result likely includes subtotal or grand-total rows alongside the groups."""
+    if _SUBTOTAL_SQL.search(sql):
+        return True
+    for column in table.columns:
+        if pa.types.is_dictionary(column.type):
+            column = column.cast(column.type.value_type)
+        if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+            labels = pc.unique(column).to_pylist()
+            if any(_TOTAL_LABEL.match(v) for v in labels if v is not None):
+                return True
+    return False
+
+
+def check_plausibility(table: pa.Table, sql: str) -> str | None:
+    """
+    Cross-check result totals and cardinalities against precomputed table aggregates.
+    Returns a reason string if the result is implausible, otherwise None.
+    """
+    stats = get_table_stats()
+    tables = _referenced_tables(sql, stats)
+    if not tables:
+        return None
+
+    max_rows = sum(stats[t]["row_count"] for t in tables)
+    if table.num_rows > max_rows * PLAUSIBILITY_TOLERANCE:
+        return (
+            f"Implausible result: {table.num_rows} rows returned but the referenced tables "
+            f"only hold {max_rows} rows. Check for a missing or incorrect JOIN condition."
+        )
+
+    for name, column in zip(table.column_names, table.columns):
+        if not (pa.types.is_integer(column.type) or pa.types.is_floating(column.type)
+                or pa.types.is_decimal(column.type)):
+            continue
+        bound = _column_bound(name, tables, stats)
+        if bound is None:
+            continue
+        limit = bound * PLAUSIBILITY_TOLERANCE
+        peak = pc.max(column).as_py()
+        if peak is not None and peak > limit:
+            return (
+                f"Implausible result: `{name}` reaches {peak:,.2f}, which exceeds the "
+                f"table-level total of {bound:,.2f}. Check for double counting from a JOIN "
+                "or an incorrect aggregation."
+            )
+        if table.num_rows > 1 and not _name_tokens(name) & _CUMULATIVE_HINTS:
+            total = pc.sum(column).as_py()
+            if total is not None and total > limit and not _has_total_rows(table, sql):
+                return (
+                    f"Implausible result: `{name}` sums to {total:,.2f} across rows, which "
+                    f"exceeds the table-level total of {bound:,.2f}. Check for overlapping "
+                    "groups or double counting."
+                )
+    return None
+
 
 def validate_results(
-    df: pd.DataFrame,
-    sql: str,  # noqa: ARG001
+    table: pa.Table,
+    sql: str,
     error: str | None,
 ) -> tuple[bool, str]:
     """
@@ -22,25 +130,22 @@ def validate_results(
         return False, f"SQL error: {error}"
 
     # 2. Empty result set
-    if df.empty:
+    if table.num_rows == 0:
         return False, "Query returned no results. The data may not exist or the filter is too restrictive."
 
     # 3. CANNOT_ANSWER marker from LLM
-    if df.shape == (1, 1):
-        val = str(df.iloc[0, 0])
+    if table.shape == (1, 1):
+        val = str(table.column(0)[0].as_py())
         if CANNOT_ANSWER_MARKER in val:
             return False, "out_of_scope"
 
     # 4. All values are NaN
-    if df.isnull().all().all():
+    if all(_all_null(column) for column in table.columns):
         return False, "Query returned only NULL values."
 
-    # 5. Sanity check: negative revenue (data quality issue)
-    for col in df.columns:
-        if "amount" in col.lower() or "revenue" in col.lower() or "sales" in col.lower():
-            numeric = pd.to_numeric(df[col], errors="coerce")
-            if (numeric < 0).any():
-                # Not a hard failure, just a warning — still valid
-                pass
+    # 5. Plausibility against precomputed table aggregates
+    reason = check_plausibility(table, sql)
+    if reason:
+        return False, reason
 
     return True, "ok"
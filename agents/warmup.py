@@ -0,0 +1,171 @@
+"""
+Startup warm-up: loads data, builds the agent graph, sets up LLM clients, primes
+DuckDB and router caches, and precomputes rollups and answers to the sample
+questions — all in a background thread so the first user doesn't pay for it.
+"""
+import threading
+import time
+
+import pandas as pd
+
+from agents.intent_router import route_question
+from agents.llm import get_llm
+from agents.orchestrator import get_graph, run_qa_pipeline
+from agents.summary_agent import SUMMARY_TEMPERATURE
+from config import ROLLUP_QUERIES, SAMPLE_QUESTIONS, WARMUP_PRECOMPUTE_ANSWERS
+from data.loader import execute_query, get_connection
+from data.result_store import pin_result, release_result
+from memory.conversation import ConversationMemory
+from monitoring.metrics import metrics
+
+
+class _WarmupState:
+    """Progress of the warm-up thread and the results it precomputed."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.thread: threading.Thread | None = None
+        self.step = "Not started"
+        self.completed = 0
+        self.total = 0
+        self.data_loaded = False
+        self.done = False
+        self.errors: list[str] = []
+        self.answers: dict[str, dict] = {}
+        self.rollups: dict[str, pd.DataFrame] = {}
+
+
+_state = _WarmupState()
+
+
+def _normalize(question: str) -> str:
+    return " ".join(question.lower().split()).rstrip("?")
+
+
+def _begin(step: str) -> None:
+    with _state.lock:
+        _state.step = step
+
+
+def _complete() -> None:
+    with _state.lock:
+        _state.completed += 1
+
+
+def _run() -> None:
+    start = time.perf_counter()
+    questions = SAMPLE_QUESTIONS if WARMUP_PRECOMPUTE_ANSWERS else []
+    with _state.lock:
+        _state.total = 4 + len(ROLLUP_QUERIES) + len(questions)
+
+    _begin("Loading data")
+    get_connection()
+    with _state.lock:
+        _state.data_loaded = True
+    _complete()
+
+    _begin("Building agent graph")
+    get_graph()
+    _complete()
+
+    _begin("Setting up LLM clients")
+    for tier in ("fast", "strong"):
+        get_llm(tier=tier)
+        get_llm(SUMMARY_TEMPERATURE, tier)
+    _complete()
+
+    # Router value caches and DuckDB buffers for the columns sample questions touch
+    _begin("Priming caches")
+    for question in SAMPLE_QUESTIONS:
+        try:
+            routed = route_question(question)
+            if routed is not None:
+                execute_query(routed.sql)
+        except Exception as e:  # noqa: BLE001 — a failed priming query must not abort warm-up
+            _state.errors.append(f"Priming '{question}': {e}")
+    _complete()
+
+    for name, sql in ROLLUP_QUERIES.items():
+        _begin(f"Precomputing rollup '{name}'")
+        try:
+            _state.rollups[name] = execute_query(sql)
+        except ValueError as e:
+            _state.errors.append(f"Rollup '{name}': {e}")
+        _complete()
+
+    for i, question in enumerate(questions, start=1):
+        _begin(f"Precomputing sample answers ({i}/{len(questions)})")
+        try:
+            answer = run_qa_pipeline(
+                question=question, history=ConversationMemory().get_formatted()
+            )
+            if answer.get("is_valid"):
+                # Shared by every session for the life of the process
+                pin_result(answer.get("result_handle"))
+                _state.answers[_normalize(question)] = answer
+            else:
+                # Not cached, so a transient failure at startup isn't served forever
+                release_result(answer.get("result_handle"))
+                reason = answer.get("validation_reason") or answer.get("error") or "invalid result"
+                _state.errors.append(f"'{question}': not cached ({reason})")
+        except Exception as e:  # noqa: BLE001 — a failed sample answer must not abort warm-up
+            _state.errors.append(f"'{question}': {e}")
+        _complete()
+
+    _begin("Ready")
+    with _state.lock:
+        _state.done = True
+    elapsed = time.perf_counter() - start
+    metrics.observe("warmup.latency", elapsed)
+    print(f"[warmup] Done in {elapsed:.1f}s with {len(_state.errors)} errors")
+
+
+def _run_guarded() -> None:
+    try:
+        _run()
+    except Exception as e:  # noqa: BLE001 — report any failure instead of dying silently
+        with _state.lock:
+            _state.errors.append(str(e))
+            _state.step = f"Failed: {e}"
+            _state.done = True
+        print(f"[warmup] ERROR: {e}")
+
+
+def start_warmup() -> None:
+    """Start the warm-up thread once per process; later calls are no-ops."""
+    with _state.lock:
+        if _state.thread is not None:
+            return
+        _state.thread = threading.Thread(target=_run_guarded, name="warmup", daemon=True)
+        _state.thread.start()
+
+
+def get_warmup_status() -> dict:
+    """Return warm-up progress: step, completed/total, data_loaded, done and errors."""
+    with _state.lock:
+        return {
+            "step": _state.step,
+            "completed": _state.completed,
+            "total": _state.total,
+            "data_loaded": _state.data_loaded,
+            "done": _state.done,
+            "errors": list(_state.errors),
+        }
+
+
+def get_precomputed_answer(question: str) -> dict | None:
+    """Return the precomputed pipeline result for a sample question, if available."""
+    metrics.incr("answer_cache.lookups")
+    result = _state.answers.get(_normalize(question))
+    if result is not None:
+        metrics.incr("answer_cache.hits")
+    return result
+
+
+def get_rollup(name: str) -> pd.DataFrame | None:
+    """
+    Return a copy of a precomputed rollup from ROLLUP_QUERIES, if warm-up has computed it.
+    A copy, because the rollup is shared across sessions and callers may mutate it.
+    """
+    rollup = _state.rollups.get(name)
+    return None if rollup is None else rollup.copy()
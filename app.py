@@ -106,7 +106,27 @@ if "memory" not in st.session_state:
 if "db_loaded" not in st.session_state:
     st.session_state.db_loaded = False
 if "api_key_set" not in st.session_state:
-    st.session_state.api_key_set = bool(os.getenv("GOOGLE_API_KEY"))
+    # Strict cassette replay and the local stand-in backend run offline, without a key
+    st.session_state.api_key_set = (
+        bool(os.getenv("GOOGLE_API_KEY"))
+        or os.getenv("LLM_CASSETTE_MODE") == "strict"
+        or os.getenv("LLM_BACKEND") == "local"
+    )
+
+
+# ─── Warm-up ──────────────────────────────────────────────────────────────────
+@st.cache_resource
+def _start_warmup() -> bool:
+    """Start the background warm-up once per process (shared by all sessions)."""
+    from agents.warmup import start_warmup
+    start_warmup()
+    return True
+
+
+if st.session_state.api_key_set:
+    from config import WARMUP_ENABLED
+    if WARMUP_ENABLED:
+        _start_warmup()
 
 with st.sidebar:
     st.markdown("## 🛍️ Retail Insights")
@@ -134,19 +154,28 @@ with st.sidebar:
     if st.session_state.db_loaded:
         st.markdown('<div class="sidebar-section">✅ DuckDB ready with 7 tables</div>', unsafe_allow_html=True)
 
+    if st.session_state.api_key_set:
+        from agents.warmup import get_warmup_status
+
+        def _render_warmup_progress() -> None:
+            status = get_warmup_status()
+            if status["data_loaded"] and not st.session_state.db_loaded:
+                st.session_state.db_loaded = True
+                st.rerun()
+            if status["total"] and not status["done"]:
+                st.progress(status["completed"] / status["total"], text=f"🔥 Warming up: {status['step']}")
+            elif status["done"] and status["errors"]:
+                st.caption(f"⚠️ Warm-up finished with {len(status['errors'])} errors.")
+
+        # Poll while warm-up is running; render once it has finished.
+        st.fragment(run_every=None if get_warmup_status()["done"] else 2)(_render_warmup_progress)()
+
     st.markdown("---")
 
     # Quick questions
     st.markdown("### 💡 Sample Questions")
-    sample_questions = [
-        "Which category had the highest sales?",
-        "What are the top 5 states by revenue?",
-        "How many orders were cancelled?",
-        "What is the total international revenue?",
-        "Which product size sells the most?",
-        "Show me stock levels by category",
-    ]
-    for q in sample_questions:
+    from config import SAMPLE_QUESTIONS
+    for q in SAMPLE_QUESTIONS:
         if st.button(q, key=f"sample_{q[:20]}", use_container_width=True):
             st.session_state["prefill_question"] = q
 
@@ -166,7 +195,58 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # ─── Tabs ─────────────────────────────────────────────────────────────────────
-tab_chat, tab_summary, tab_schema = st.tabs(["💬 Chat Q&A", "📊 Auto Summary", "🗄️ Data Schema"])
+tab_chat, tab_summary, tab_schema, tab_diagnostics = st.tabs(
+    ["💬 Chat Q&A", "📊 Auto Summary", "🗄️ Data Schema", "🩺 Diagnostics"]
+)
+
+
+# ─── Export ───────────────────────────────────────────────────────────────────
+def _render_export(index: int, msg: dict, question: str) -> None:
+    """
+    Row-count preview, streaming export and download of one answer's full result.
+    Only the display cap is dropped; a LIMIT the question asked for ("top 5") is kept.
+    """
+    from pathlib import Path
+    from data.export import count_rows, export_path, export_query, strip_display_limit
+
+    sql = strip_display_limit(msg["sql"], question)
+    fmt = st.radio("Format", ["csv", "parquet"], horizontal=True, key=f"export_fmt_{index}")
+    count_col, export_col = st.columns(2)
+    try:
+        if count_col.button("🔢 Preview row count", key=f"export_count_{index}"):
+            msg["export_rows"] = count_rows(sql)
+        if export_col.button("📦 Prepare export", key=f"export_run_{index}"):
+            total = msg.get("export_rows") or count_rows(sql)
+            msg["export_rows"] = total
+            bar = st.progress(0.0, text="Exporting...")
+            path = export_path(f"answer_{st.session_state.memory.session_id}_{index}", fmt)
+            export_query(
+                sql, path, fmt, total_rows=total,
+                progress=lambda done, n: bar.progress(
+                    min(done / max(n or 1, 1), 1.0), text=f"{done:,} / {n:,} rows"
+                ),
+            )
+            msg["export_path"] = str(path)
+    except ValueError as e:
+        st.error(f"Export failed: {e}")
+
+    if "export_rows" in msg:
+        st.caption(f"Full result: {msg['export_rows']:,} rows")
+    path = Path(msg.get("export_path", ""))
+    if msg.get("export_path") and path.exists():
+        kwargs = dict(
+            label=f"⬇️ Download {path.suffix.lstrip('.').upper()}",
+            file_name=f"answer_{index}{path.suffix}",
+            mime="text/csv" if path.suffix == ".csv" else "application/octet-stream",
+            key=f"export_download_{index}",
+        )
+        try:
+            # Deferred: the file is read only when the user clicks
+            st.download_button(data=path.read_bytes, **kwargs)
+        except st.errors.StreamlitAPIException:
+            # Streamlit versions without callable downloads
+            with open(path, "rb") as f:
+                st.download_button(data=f, **kwargs)
 
 
 # ─── Tab 1: Chat Q&A ──────────────────────────────────────────────────────────
@@ -179,7 +259,7 @@ with tab_chat:
         # Display chat history
         chat_container = st.container()
         with chat_container:
-            for msg in st.session_state.messages:
+            for i, msg in enumerate(st.session_state.messages):
                 if msg["role"] == "user":
                     st.markdown(f'<div class="chat-user">🧑 {msg["content"]}</div>', unsafe_allow_html=True)
                 else:
@@ -190,6 +270,11 @@ with tab_chat:
                     if msg.get("dataframe") is not None and not msg["dataframe"].empty:
                         with st.expander("📋 View Raw Data", expanded=False):
                             st.dataframe(msg["dataframe"], use_container_width=True)
+                    # Answers over `last_result` depend on the session's state at the time
+                    if msg.get("sql") and "last_result" not in msg["sql"]:
+                        with st.expander("⬇️ Export Full Result", expanded=False):
+                            question = st.session_state.messages[i - 1]["content"] if i else ""
+                            _render_export(i, msg, question)
 
         # Input
         prefill = st.session_state.pop("prefill_question", "")
@@ -205,12 +290,25 @@ with tab_chat:
             with st.spinner("🤖 Agents working..."):
                 try:
                     from agents.orchestrator import run_qa_pipeline
-                    history = st.session_state.memory.get_formatted()
-                    result = run_qa_pipeline(question=question, history=history)
+                    from agents.warmup import get_precomputed_answer
+                    from data.result_store import get_result, release_result, result_frame
+                    from data.session_results import set_last_result
+                    memory = st.session_state.memory
+                    history = memory.get_formatted()
+                    result = get_precomputed_answer(question) or run_qa_pipeline(
+                        question=question, history=history, session_id=memory.session_id
+                    )
 
                     answer = result.get("final_answer", "Sorry, I couldn't process that.")
                     sql = result.get("sql", "")
-                    df = result.get("result_df", pd.DataFrame())
+                    # Keep the answer for follow-ups and materialize the display copy,
+                    # then drop the pipeline's reference
+                    handle = result.get("result_handle")
+                    if result.get("is_valid"):
+                        set_last_result(memory.session_id, handle, question, sql)
+                    table = get_result(handle)
+                    df = result_frame(table) if table is not None else pd.DataFrame()
+                    release_result(handle)
 
                     st.session_state.memory.add_assistant(answer)
                     st.session_state.messages.append({
@@ -243,9 +341,16 @@ with tab_summary:
                     try:
                         from data.loader import execute_query
                         from agents.summary_agent import generate_full_summary
+                        from agents.warmup import get_rollup
+                        from config import ROLLUP_QUERIES
 
-                        amazon_df = execute_query("SELECT * FROM amazon_sales LIMIT 10000")
-                        intl_df = execute_query("SELECT * FROM international_sales LIMIT 5000")
+                        # Use the extracts precomputed by warm-up when available
+                        amazon_df = get_rollup("summary_amazon")
+                        if amazon_df is None:
+                            amazon_df = execute_query(ROLLUP_QUERIES["summary_amazon"])
+                        intl_df = get_rollup("summary_international")
+                        if intl_df is None:
+                            intl_df = execute_query(ROLLUP_QUERIES["summary_international"])
 
                         # Show quick metrics
                         st.session_state["summary_amazon_df"] = amazon_df
@@ -312,13 +417,114 @@ with tab_schema:
     if not st.session_state.db_loaded:
         st.info("👈 Click **Load / Reload Data** in the sidebar to see the schema.")
     else:
-        from data.loader import get_schema_info, execute_query
+        from data.loader import get_schema_info, execute_query, get_table_memory
         from config import DATASETS
 
+        table_memory = get_table_memory()
         for table_name in DATASETS.keys():
             try:
                 df_preview = execute_query(f"SELECT * FROM {table_name} LIMIT 5")
-                with st.expander(f"📋 `{table_name}` — {len(df_preview.columns)} columns", expanded=False):
+                mem_mb = table_memory.get(table_name, 0) / 1e6
+                with st.expander(
+                    f"📋 `{table_name}` — {len(df_preview.columns)} columns, {mem_mb:.1f} MB resident",
+                    expanded=False,
+                ):
                     st.dataframe(df_preview, use_container_width=True)
             except Exception as e:
                 st.warning(f"Could not preview `{table_name}`: {e}")
+
+
+# ─── Tab 4: Diagnostics ───────────────────────────────────────────────────────
+with tab_diagnostics:
+    from monitoring.metrics import metrics, rate
+    from monitoring.slow_query_log import get_slow_queries, clear_slow_queries
+
+    st.markdown("### 🩺 Pipeline Diagnostics")
+    if st.button("🔄 Refresh", key="diagnostics_refresh"):
+        st.rerun()
+
+    # Hit rates
+    st.markdown("#### 🎯 Hit Rates")
+    r0, r1, r2, r3, r4 = st.columns(5)
+    r0.metric("Precomputed answers", f"{rate('answer_cache.hits', 'answer_cache.lookups'):.0%}",
+              help=f"{metrics.counter('answer_cache.lookups')} lookups")
+    r1.metric("Template fast path", f"{rate('router.hits', 'router.attempts'):.0%}",
+              help=f"{metrics.counter('router.attempts')} questions routed")
+    summaries = metrics.counter("summary.rules") + metrics.counter("summary.llm")
+    r2.metric("Rule-based summaries",
+              f"{metrics.counter('summary.rules') / summaries:.0%}" if summaries else "—")
+    r3.metric("Speculative win rate", f"{rate('speculative.wins', 'speculative.runs'):.0%}")
+    r4.metric("Speculative waste rate", f"{rate('speculative.wasted', 'speculative.launched'):.0%}")
+
+    from agents.model_router import model_routing_stats
+    routing = model_routing_stats()
+    m0, m1, m2, m3 = st.columns(4)
+    m0.metric("Fast-model share", f"{routing['fast_share']:.0%}",
+              help="Share of SQL attempts generated by the fast model")
+    m1.metric("Fast-model success", f"{routing['fast_success_rate']:.0%}")
+    m2.metric("Strong-model success", f"{routing['strong_success_rate']:.0%}")
+    m3.metric("Escalation rate", f"{routing['escalation_rate']:.0%}",
+              help="Fast-model attempts that failed validation and were retried on the strong model")
+
+    from data.result_store import result_store_stats
+    store = result_store_stats()
+    st.caption(
+        f"Result store: {store['entries']} live results, {store['bytes'] / 1e6:.1f} MB "
+        f"({metrics.counter('result_store.expired')} expired)"
+    )
+
+    # Per-stage latencies
+    st.markdown("#### ⏱️ Latencies")
+    latency_names = (
+        metrics.latency_names("stage.")
+        + metrics.latency_names("pipeline.")
+        + metrics.latency_names("query.")
+        + metrics.latency_names("summary.latency.")
+        + metrics.latency_names("llm.latency.")
+        + metrics.latency_names("model_route.latency.")
+        + metrics.latency_names("warmup.")
+    )
+    if latency_names:
+        latency_df = pd.DataFrame(
+            [{"stage": name, **metrics.latency(name)} for name in latency_names]
+        ).round(1)
+        st.dataframe(latency_df, use_container_width=True, hide_index=True)
+    else:
+        st.info("No latencies recorded yet. Ask a question in the Chat tab.")
+
+    # Point-lookup benchmark from load time
+    from data.loader import get_lookup_latency
+    if st.session_state.db_loaded:
+        lookup_latency = get_lookup_latency()
+        if lookup_latency:
+            st.markdown("#### 🔎 Indexed Point Lookups")
+            st.dataframe(
+                pd.DataFrame(
+                    [{"column": name, **timings} for name, timings in lookup_latency.items()]
+                ).round(2),
+                use_container_width=True,
+                hide_index=True,
+            )
+
+    # Slow queries
+    st.markdown("#### 🐢 Slowest Queries")
+    slow_queries = get_slow_queries()
+    if not slow_queries:
+        st.info("No slow queries logged.")
+    else:
+        st.dataframe(
+            pd.DataFrame(slow_queries)[["latency_ms", "rows", "question", "sql", "timestamp"]],
+            use_container_width=True,
+            hide_index=True,
+        )
+        for entry in slow_queries:
+            label = entry["question"] or entry["sql"][:80]
+            with st.expander(f"{entry['latency_ms']:,.0f} ms — {label}", expanded=False):
+                st.code(entry["sql"], language="sql")
+                if entry.get("profile"):
+                    st.code(entry["profile"], language="text")
+                else:
+                    st.caption("No profile captured.")
+        if st.button("🗑️ Clear Slow-Query Log", key="clear_slow_log"):
+            clear_slow_queries()
+            st.rerun()
@@ -3,6 +3,7 @@ Configuration for the Retail Insights Assistant.
 Set your GOOGLE_API_KEY in a .env file or as an environment variable.
 """
 import os
+import tempfile
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -12,7 +13,9 @@ load_dotenv()
 BASE_DIR = Path(__file__).parent
 DATA_DIR = BASE_DIR / "Sales Dataset" / "Sales Dataset"
 
-# Dataset files
+# Dataset files. An entry may be a single CSV, a directory of CSVs, or a glob
+# (e.g. DATA_DIR / "amazon" / "*.csv"); multi-file entries become one table
+# with a `source_file` column, ingested in parallel.
 DATASETS = {
     "amazon_sales": DATA_DIR / "Amazon Sale Report.csv",
     "international_sales": DATA_DIR / "International sale Report.csv",
@@ -22,17 +25,134 @@ DATASETS = {
     "cloud_warehouse": DATA_DIR / "Cloud Warehouse Compersion Chart.csv",
     "expense": DATA_DIR / "Expense IIGF.csv",
 }
+INGEST_THREADS = os.cpu_count() or 4  # DuckDB threads for multi-file ingest
+CSV_ENCODING = "latin-1"  # Encoding for multi-file ingest (tolerates non-UTF-8 bytes)
+
+# --- Storage ---
+# Lean mode copies each CSV into native DuckDB storage and releases the pandas frame,
+# dictionary-encoding low-cardinality strings as ENUMs.
+LEAN_LOAD = True
+ENUM_MAX_CARDINALITY = 256  # Max distinct values for a string column to become an ENUM
+DUCKDB_MEMORY_LIMIT = os.getenv("DUCKDB_MEMORY_LIMIT", "")  # e.g. "2GB"; empty = DuckDB default
+DUCKDB_TEMP_DIR = os.getenv("DUCKDB_TEMP_DIR", "")  # Spill directory used under the memory limit
+
+# Physical layout of native tables: rows are sorted by these keys so zone maps prune
+# row groups on date and SKU filters, and the index columns get ART indexes for
+# point lookups ("order 405-…", "stock for SKU X"). Each index costs roughly 50 bytes
+# per row of memory; drop entries here to trade lookup speed for footprint.
+TABLE_SORT_KEYS = {
+    "amazon_sales": ["date", "sku"],
+    "international_sales": ["date", "sku"],
+    "sale_report": ["sku_code"],
+    "may_2022": ["sku"],
+    "pl_march_2021": ["sku"],
+}
+TABLE_INDEXES = {
+    "amazon_sales": ["order_id", "sku"],
+    "international_sales": ["sku"],
+    "sale_report": ["sku_code"],
+    "may_2022": ["sku"],
+    "pl_march_2021": ["sku"],
+}
+DATE_TEXT_FORMAT = "%m-%d-%y"  # Text date columns (e.g. 04-30-22) are sorted chronologically with this
 
 # --- LLM ---
+# Cassette layer beneath the LLM clients: "off" calls Gemini directly, "record" saves every
+# prompt → response pair, "replay" serves recorded responses and records misses, "strict"
+# serves recorded responses only and fails on a miss (no API key or network needed).
+LLM_CASSETTE_MODE = os.getenv("LLM_CASSETTE_MODE", "off")
+LLM_CASSETTE_DIR = Path(os.getenv("LLM_CASSETTE_DIR", BASE_DIR / "cassettes"))
+# Simulated latency on replay: "recorded" sleeps for the original call's duration,
+# a number sleeps that many milliseconds, "0" replays instantly.
+LLM_CASSETTE_LATENCY = os.getenv("LLM_CASSETTE_LATENCY", "0")
+
+# LLM backend: "gemini", or "local" for an offline stand-in that answers SQL prompts with the
+# template router and summaries with the result digest (no API key; for testing the pipeline).
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+LOCAL_LLM_LATENCY_S = {"fast": 0.2, "strong": 1.0}  # Simulated latency per model tier
+
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY", "")
-if not GOOGLE_API_KEY:
+if not GOOGLE_API_KEY and LLM_CASSETTE_MODE != "strict" and LLM_BACKEND != "local":
     raise ValueError(
         "GOOGLE_API_KEY is not set. "
         "Add it to your .env file or set it as an environment variable."
     )
 GEMINI_MODEL = "gemini-2.5-flash"
 
+# Model routing: simple questions go to the fast model; complex ones (several tables,
+# comparisons, trends, narrative) and every retry after a validation failure go to the strong one.
+MODEL_ROUTING = True
+MODEL_TIERS = {"fast": "gemini-2.5-flash-lite", "strong": GEMINI_MODEL}
+MODEL_ROUTING_THRESHOLD = 2  # Complexity score from which a question goes to the strong model
+
 # --- Agent settings ---
 MAX_RETRIES = 3          # Max SQL retry attempts by validation agent
-MAX_RESULT_ROWS = 50     # Max rows to pass to summary agent
+MAX_RESULT_ROWS = 50     # Default LIMIT for templated breakdown queries (the query prompt caps at 50 too)
+# Summary rendering: "auto" renders small results with rules unless the user asks for
+# narrative, "rules" always renders with rules when possible, "llm" always calls the LLM.
+SUMMARY_MODE = "auto"
+RULES_MAX_ROWS = 15      # Largest ranked list / breakdown rendered without the LLM
+SUMMARY_TOKEN_BUDGET = 1500  # Approximate token budget for the result digest in the summary prompt
+DIGEST_HEAD_ROWS = 20    # Leading rows shown in the digest before eliding
+DIGEST_TAIL_ROWS = 5     # Trailing rows shown after the elided middle
+DIGEST_MAX_CELL_CHARS = 40  # Long string cells are truncated to this length
 MEMORY_WINDOW = 10       # Number of conversation turns to keep in memory
+
+# --- Validation ---
+# Numeric columns per table, tagged by kind. Their table-level totals are
+# precomputed at load time and bound any aggregate a query can return.
+METRIC_COLUMNS = {
+    "amazon_sales": {"amount": "revenue", "qty": "quantity"},
+    "international_sales": {"gross_amt": "revenue", "pcs": "quantity"},
+    "sale_report": {"stock": "quantity"},
+}
+PLAUSIBILITY_TOLERANCE = 1.01  # Slack allowed over precomputed totals (float rounding)
+
+# --- Speculative SQL candidates ---
+SPECULATIVE_CANDIDATES = 1   # SQL candidates raced per question; 1 disables speculative mode
+SPECULATIVE_TEMPERATURES = [0.0, 0.4, 0.8]  # Temperature per candidate (cycled if fewer than N)
+
+# --- Intent router (template fast path) ---
+ROUTER_ENABLED = True
+ROUTER_MIN_CONFIDENCE = 0.8      # Share of content words a template must account for
+ROUTER_MAX_FILTER_VALUES = 1000  # Columns with more distinct values aren't matched as filters
+
+# --- Warm-up ---
+WARMUP_ENABLED = True             # Warm up in a background thread at process start
+WARMUP_PRECOMPUTE_ANSWERS = True  # Precompute answers to SAMPLE_QUESTIONS during warm-up
+SAMPLE_QUESTIONS = [
+    "Which category had the highest sales?",
+    "What are the top 5 states by revenue?",
+    "How many orders were cancelled?",
+    "What is the total international revenue?",
+    "Which product size sells the most?",
+    "Show me stock levels by category",
+]
+# Extracts behind the Auto Summary tab, precomputed during warm-up
+ROLLUP_QUERIES = {
+    "summary_amazon": "SELECT * FROM amazon_sales LIMIT 10000",
+    "summary_international": "SELECT * FROM international_sales LIMIT 5000",
+}
+
+# --- Result store ---
+RESULT_STORE_TTL_S = 600   # Unpinned query results unused this long are freed even if still referenced
+
+# --- Follow-up questions ---
+# Each chat session's latest result is queryable as `last_result` by follow-up questions.
+LAST_RESULT_TTL_S = 600          # Idle time before a session's last result expires (≤ RESULT_STORE_TTL_S)
+LAST_RESULT_MAX_SESSIONS = 64    # Sessions whose last result is kept (least recently used evicted)
+LAST_RESULT_MAX_ROWS = 100_000   # Larger results are not kept for follow-ups
+
+# --- Export ---
+EXPORT_BATCH_ROWS = 100_000   # Rows per Arrow batch when streaming an export (bounds memory)
+EXPORT_DIR = Path(tempfile.gettempdir()) / "retail_insights_exports"
+EXPORT_MAX_AGE_S = 3600       # Exported files older than this are removed on the next export
+
+# --- Metrics ---
+METRICS_WINDOW = 500     # Latency samples kept per metric
+
+# --- Slow-query log ---
+SLOW_QUERY_THRESHOLD_MS = 500  # Queries slower than this are logged
+SLOW_QUERY_PROFILE = True      # Capture an EXPLAIN ANALYZE profile for logged queries
+SLOW_QUERY_LOG_PATH = BASE_DIR / "logs" / "slow_queries.jsonl"
+SLOW_QUERY_LOG_MAX = 200       # Entries retained (oldest evicted first)
@@ -0,0 +1,110 @@
+"""
+Semantic catalog of the sales tables: the dimensions questions group or filter by,
+and the metrics they aggregate. Used by the intent router to build SQL without the LLM.
+"""
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Dimension:
+    """A groupable attribute, mapped to its column in each table that has it."""
+
+    name: str
+    columns: dict[str, str]          # table -> column
+    synonyms: tuple[str, ...]
+    filterable: bool = True          # Whether its values can be matched as filters
+
+
+@dataclass(frozen=True)
+class Metric:
+    """An aggregate over a single table."""
+
+    name: str
+    table: str
+    expression: str
+    alias: str
+    synonyms: tuple[str, ...]
+
+
+DIMENSIONS = [
+    Dimension(
+        "category",
+        {"amazon_sales": "category", "sale_report": "category"},
+        ("category", "categories"),
+    ),
+    Dimension(
+        "state",
+        {"amazon_sales": "ship_state"},
+        ("state", "states", "region", "regions"),
+    ),
+    Dimension(
+        "city",
+        {"amazon_sales": "ship_city"},
+        ("city", "cities"),
+        filterable=False,
+    ),
+    Dimension(
+        "size",
+        {"amazon_sales": "size", "international_sales": "size", "sale_report": "size"},
+        ("size", "sizes"),
+    ),
+    Dimension(
+        "status",
+        {"amazon_sales": "status"},
+        ("status", "statuses", "order status"),
+    ),
+    Dimension(
+        "fulfilment",
+        {"amazon_sales": "fulfilment"},
+        ("fulfilment", "fulfillment", "fulfilment channel"),
+    ),
+    Dimension(
+        "customer",
+        {"international_sales": "customer"},
+        ("customer", "customers", "buyer", "buyers"),
+        filterable=False,
+    ),
+    Dimension(
+        "color",
+        {"sale_report": "color"},
+        ("color", "colors", "colour", "colours"),
+    ),
+]
+
+METRICS = [
+    Metric(
+        "revenue",
+        "amazon_sales",
+        "SUM(TRY_CAST(amount AS DOUBLE))",
+        "total_sales",
+        ("revenue", "sales", "sales amount", "amount"),
+    ),
+    Metric(
+        "orders",
+        "amazon_sales",
+        "COUNT(*)",
+        "order_count",
+        ("orders", "order", "order volume", "order count", "sells", "sell", "sold"),
+    ),
+    Metric(
+        "units",
+        "amazon_sales",
+        "SUM(TRY_CAST(qty AS INTEGER))",
+        "total_units",
+        ("units", "quantity", "qty"),
+    ),
+    Metric(
+        "international_revenue",
+        "international_sales",
+        "SUM(TRY_CAST(gross_amt AS DOUBLE))",
+        "total_international_revenue",
+        ("international revenue", "international sales", "international sales amount"),
+    ),
+    Metric(
+        "stock",
+        "sale_report",
+        "SUM(TRY_CAST(stock AS INTEGER))",
+        "total_stock",
+        ("stock", "stock level", "inventory"),
+    ),
+]
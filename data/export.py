@@ -0,0 +1,152 @@
+"""
+Streaming export of query results to CSV or Parquet.
+Re-executes an answer's SQL and writes it in Arrow record batches, so memory stays
+constant however many rows the full result has. Usable from the app and as a batch job:
+
+    python -m data.export "SELECT * FROM amazon_sales WHERE ship_state = 'KERALA'" kerala.parquet
+"""
+import argparse
+import re
+import time
+from pathlib import Path
+from typing import Callable
+
+import duckdb
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from config import EXPORT_BATCH_ROWS, EXPORT_DIR, EXPORT_MAX_AGE_S, MAX_RESULT_ROWS
+from data.loader import get_cursor
+
+EXPORT_FORMATS = ("csv", "parquet")
+
+_TRAILING_LIMIT = re.compile(
+    r"\s+LIMIT\s+(\d+)(?:\s+OFFSET\s+\d+)?\s*;?\s*$", flags=re.IGNORECASE
+)
+
+
+def strip_limit(sql: str) -> str:
+    """Remove a trailing LIMIT (and OFFSET) so the export covers the full result."""
+    return _TRAILING_LIMIT.sub("", sql.strip().rstrip(";"))
+
+
+def strip_display_limit(sql: str, question: str = "") -> str:
+    """
+    Remove a trailing LIMIT only if it is the display cap (MAX_RESULT_ROWS, the
+    query prompt's default) and the question didn't ask for that many rows.
+    A LIMIT that is part of the answer ("top 5 states") is kept.
+    """
+    match = _TRAILING_LIMIT.search(sql.strip().rstrip(";"))
+    if match is None or int(match.group(1)) != MAX_RESULT_ROWS:
+        return sql
+    if re.search(rf"\b{MAX_RESULT_ROWS}\b", question):
+        return sql
+    return strip_limit(sql)
+
+
+def count_rows(sql: str) -> int:
+    """Row count of a query's full result, as a preview before exporting."""
+    cursor = get_cursor()
+    try:
+        return cursor.execute(f"SELECT COUNT(*) FROM ({sql.strip().rstrip(';')})").fetchone()[0]
+    except duckdb.Error as e:
+        raise ValueError(f"SQL execution error: {e}") from e
+    finally:
+        cursor.close()
+
+
+def _plain_schema(schema: pa.Schema) -> pa.Schema:
+    """Replace dictionary (ENUM) types by their value types; the CSV writer can't write them."""
+    return pa.schema([
+        pa.field(f.name, f.type.value_type) if pa.types.is_dictionary(f.type) else f
+        for f in schema
+    ])
+
+
+def _decode(batch: pa.RecordBatch, schema: pa.Schema) -> pa.RecordBatch:
+    return pa.RecordBatch.from_arrays(
+        [column.cast(field.type) for column, field in zip(batch.columns, schema)],
+        schema=schema,
+    )
+
+
+def export_query(
+    sql: str,
+    path: str | Path,
+    fmt: str = "csv",
+    progress: Callable[[int, int | None], None] | None = None,
+    total_rows: int | None = None,
+    batch_rows: int = EXPORT_BATCH_ROWS,
+) -> int:
+    """
+    Stream a query's result to a CSV or Parquet file, `batch_rows` rows at a time.
+    `progress(rows_written, total_rows)` is called after each batch; pass `total_rows`
+    (e.g. from `count_rows`) to report a fraction. Returns the number of rows written.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format '{fmt}'; expected one of {EXPORT_FORMATS}.")
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    cursor = get_cursor()
+    rows_written = 0
+    try:
+        result = cursor.execute(sql)
+        # DuckDB 1.5 renamed fetch_record_batch() to to_arrow_reader()
+        open_reader = getattr(result, "to_arrow_reader", None) or result.fetch_record_batch
+        reader = open_reader(batch_rows)
+        if fmt == "csv":
+            schema = _plain_schema(reader.schema)
+            writer = pa_csv.CSVWriter(path, schema)
+        else:
+            schema = reader.schema
+            writer = pq.ParquetWriter(path, schema)
+        try:
+            for batch in reader:
+                writer.write_batch(_decode(batch, schema) if fmt == "csv" else batch)
+                rows_written += batch.num_rows
+                if progress is not None:
+                    progress(rows_written, total_rows)
+        finally:
+            writer.close()
+    except duckdb.Error as e:
+        raise ValueError(f"SQL execution error: {e}") from e
+    finally:
+        cursor.close()
+
+    print(f"[export] Wrote {rows_written} rows to {path}")
+    return rows_written
+
+
+def export_path(name: str, fmt: str) -> Path:
+    """A file path under EXPORT_DIR for a new export; exports older than EXPORT_MAX_AGE_S are removed."""
+    EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+    cutoff = time.time() - EXPORT_MAX_AGE_S
+    for old in EXPORT_DIR.iterdir():
+        if old.is_file() and old.stat().st_mtime < cutoff:
+            old.unlink(missing_ok=True)
+    return EXPORT_DIR / f"{name}.{fmt}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stream a SQL query's result to CSV or Parquet.")
+    parser.add_argument("sql", help="SQL query to export")
+    parser.add_argument("output", help="Output file (.csv or .parquet)")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, help="Defaults to the output file's extension")
+    parser.add_argument("--keep-limit", action="store_true", help="Keep a trailing LIMIT in the query")
+    args = parser.parse_args()
+
+    fmt = args.format or Path(args.output).suffix.lstrip(".").lower()
+    sql = args.sql if args.keep_limit else strip_limit(args.sql)
+    total = count_rows(sql)
+    print(f"[export] {total} rows to export")
+
+    def report(done: int, total_rows: int | None) -> None:
+        print(f"[export] {done}/{total_rows} rows ({done / max(total_rows or 1, 1):.0%})")
+
+    export_query(sql, args.output, fmt, progress=report, total_rows=total)
+
+
+if __name__ == "__main__":
+    main()
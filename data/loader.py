@@ -1,13 +1,33 @@
 """
 DuckDB setup and CSV data loader.
 Loads all sales CSVs as virtual tables into an in-memory DuckDB connection.
+Dataset entries naming a directory or glob are ingested in parallel into one native table.
 """
+import glob
+import statistics
+import threading
+import time
 from pathlib import Path
+from typing import Callable
 
 import duckdb
 import pandas as pd
+import pyarrow as pa
 
-from config import DATASETS
+from config import (
+    DATASETS,
+    METRIC_COLUMNS,
+    INGEST_THREADS,
+    CSV_ENCODING,
+    LEAN_LOAD,
+    ENUM_MAX_CARDINALITY,
+    DUCKDB_MEMORY_LIMIT,
+    DUCKDB_TEMP_DIR,
+    TABLE_SORT_KEYS,
+    TABLE_INDEXES,
+    DATE_TEXT_FORMAT,
+)
+from monitoring.slow_query_log import record_query
 
 
 class _State:
@@ -15,54 +35,360 @@ class _State:
 
     conn: duckdb.DuckDBPyConnection | None = None
     schema_info: str = ""
+    table_stats: dict[str, dict] = {}
+    frames: dict[str, pd.DataFrame] = {}
+    table_memory: dict[str, int] = {}
+    lookup_latency: dict[str, dict[str, float]] = {}
 
 
 _state = _State()
+_load_lock = threading.Lock()  # Serializes the first load when worker threads race to it
 
 
 def get_connection() -> duckdb.DuckDBPyConnection:
     """Return (or create) the shared DuckDB connection with all tables loaded."""
     if _state.conn is not None:
         return _state.conn
+    with _load_lock:
+        if _state.conn is None:
+            _load_all()
+    return _state.conn
+
 
-    _state.conn = duckdb.connect(database=":memory:")
+def _load_all() -> None:
+    """Load every dataset into a fresh connection and precompute schema info and stats."""
+    conn = duckdb.connect(database=":memory:")
+    conn.execute(f"SET threads = {INGEST_THREADS}")
+    if DUCKDB_MEMORY_LIMIT:
+        conn.execute(f"SET memory_limit = '{DUCKDB_MEMORY_LIMIT}'")
+    if DUCKDB_TEMP_DIR:
+        # Lets operators spill to disk instead of failing when the memory limit is hit
+        conn.execute(f"SET temp_directory = '{DUCKDB_TEMP_DIR}'")
+    _state.frames = {}
+    _state.table_memory = {}
+    _state.lookup_latency = {}
 
     schema_parts = []
-    for table_name, file_path in DATASETS.items():
-        path = Path(file_path)
-        if not path.exists():
-            print(f"[loader] WARNING: {path} not found, skipping.")
+    for table_name, source in DATASETS.items():
+        files = _resolve_files(source)
+        if not files:
+            print(f"[loader] WARNING: {source} not found, skipping.")
             continue
         try:
-            # Read CSV with pandas first to handle encoding issues
-            df = pd.read_csv(path, encoding="unicode_escape", low_memory=False)
-            # Clean column names: lowercase, replace spaces/special chars with underscores
-            df.columns = [
-                c.strip().lower()
-                 .replace(" ", "_")
-                 .replace("-", "_")
-                 .replace(".", "_")
-                 .replace("(", "")
-                 .replace(")", "")
-                 .replace("/", "_")
-                for c in df.columns
-            ]
-            # Register as a DuckDB view
-            _state.conn.register(table_name, df)
-            # Build schema description
-            col_info = ", ".join(f"{col} ({dtype})" for col, dtype in zip(df.columns, df.dtypes))
-            sample = df.head(2).to_dict(orient="records")
-            schema_parts.append(
-                f"Table: {table_name}\n"
-                f"  Columns: {col_info}\n"
-                f"  Sample rows: {sample}\n"
-            )
-            print(f"[loader] Loaded '{table_name}' — {len(df)} rows, {len(df.columns)} cols")
+            if _is_multi_file(source):
+                schema_parts.append(_ingest_files(conn, table_name, files))
+            else:
+                schema_parts.append(_load_csv(conn, table_name, files[0]))
         except (pd.errors.ParserError, UnicodeDecodeError, duckdb.Error, OSError) as e:
             print(f"[loader] ERROR loading {table_name}: {e}")
 
     _state.schema_info = "\n".join(schema_parts)
-    return _state.conn
+    _state.table_stats = _compute_table_stats(conn)
+    _state.conn = conn
+
+
+def _clean_column_name(name: str) -> str:
+    """Lowercase and replace spaces/special chars with underscores."""
+    return (
+        name.strip().lower()
+        .replace(" ", "_")
+        .replace("-", "_")
+        .replace(".", "_")
+        .replace("(", "")
+        .replace(")", "")
+        .replace("/", "_")
+    )
+
+
+def _is_multi_file(source: str | Path) -> bool:
+    """A dataset entry is multi-file if it names a directory or contains glob characters."""
+    return Path(source).is_dir() or any(ch in str(source) for ch in "*?[")
+
+
+def _resolve_files(source: str | Path) -> list[Path]:
+    """Expand a dataset entry (file, directory of CSVs, or glob) into the CSV files it names."""
+    path = Path(source)
+    if path.is_dir():
+        return sorted(path.glob("*.csv"))
+    if _is_multi_file(source):
+        return sorted(Path(p) for p in glob.glob(str(source), recursive=True))
+    return [path] if path.exists() else []
+
+
+def _load_csv(conn: duckdb.DuckDBPyConnection, table_name: str, path: Path) -> str:
+    """
+    Load a single CSV through pandas. Returns its schema description.
+    In lean mode the frame is materialized into native DuckDB storage and released;
+    otherwise it is registered as a view and kept alive.
+    """
+    # Read CSV with pandas first to handle encoding issues
+    df = pd.read_csv(path, encoding="unicode_escape", low_memory=False)
+    df.columns = [_clean_column_name(c) for c in df.columns]
+    frame_bytes = int(df.memory_usage(deep=True).sum())
+
+    if LEAN_LOAD:
+        before = _memory_usage(conn)
+        conn.register("_staging", df)
+        conn.execute(f"CREATE OR REPLACE TABLE {table_name} AS SELECT * FROM _staging")
+        conn.unregister("_staging")
+        n_rows, n_cols = df.shape
+        del df
+        _finalize_native_table(conn, table_name, before)
+        print(
+            f"[loader] Loaded '{table_name}' — {n_rows} rows, {n_cols} cols, "
+            f"{_state.table_memory[table_name] / 1e6:.1f} MB resident "
+            f"(pandas: {frame_bytes / 1e6:.1f} MB)"
+        )
+        return _describe_table(conn, table_name)
+
+    # Register as a DuckDB view
+    conn.register(table_name, df)
+    _state.frames[table_name] = df
+    _state.table_memory[table_name] = frame_bytes
+    # Build schema description
+    col_info = ", ".join(f"{col} ({dtype})" for col, dtype in zip(df.columns, df.dtypes))
+    sample = df.head(2).to_dict(orient="records")
+    print(
+        f"[loader] Loaded '{table_name}' — {len(df)} rows, {len(df.columns)} cols, "
+        f"{frame_bytes / 1e6:.1f} MB resident"
+    )
+    return (
+        f"Table: {table_name}\n"
+        f"  Columns: {col_info}\n"
+        f"  Sample rows: {sample}\n"
+    )
+
+
+def _memory_usage(conn: duckdb.DuckDBPyConnection) -> int:
+    """Total bytes currently held by DuckDB's buffer manager."""
+    return int(conn.execute("SELECT SUM(memory_usage_bytes) FROM duckdb_memory()").fetchone()[0] or 0)
+
+
+def _finalize_native_table(conn: duckdb.DuckDBPyConnection, table_name: str, before: int) -> None:
+    """
+    Sort the table by its configured keys, dictionary-encode it in lean mode, build its
+    point-lookup indexes, and checkpoint so DuckDB compresses it and drops superseded
+    column data. Records the table's resident bytes and lookup latency before/after.
+    """
+    lookups = _sample_lookups(conn, table_name)
+    baseline = {column: _time_lookup(conn, sql) for column, sql in lookups.items()}
+    _sort_table(conn, table_name)
+    if LEAN_LOAD:
+        _encode_low_cardinality(conn, table_name)
+    # Checkpoint before indexing: DuckDB defers compressing a table that already has indexes
+    conn.execute("CHECKPOINT")
+    _create_indexes(conn, table_name)
+    _state.table_memory[table_name] = _memory_usage(conn) - before
+
+    for column, sql in lookups.items():
+        after = _time_lookup(conn, sql)
+        _state.lookup_latency[f"{table_name}.{column}"] = {
+            "before_ms": baseline[column], "after_ms": after,
+        }
+        print(
+            f"[loader] Lookup on {table_name}.{column}: "
+            f"{baseline[column]:.2f} ms → {after:.2f} ms with index"
+        )
+
+
+def _table_columns(conn: duckdb.DuckDBPyConnection, table_name: str) -> dict[str, str]:
+    return {name: dtype for name, dtype, *_ in conn.execute(f"DESCRIBE {table_name}").fetchall()}
+
+
+def _sort_table(conn: duckdb.DuckDBPyConnection, table_name: str) -> None:
+    """
+    Rewrite the table ordered by its TABLE_SORT_KEYS so per-row-group min/max
+    (zone maps) let range and equality filters skip row groups.
+    """
+    columns = _table_columns(conn, table_name)
+    keys = []
+    for column in TABLE_SORT_KEYS.get(table_name, []):
+        if column not in columns:
+            continue
+        if "date" in column and columns[column] == "VARCHAR":
+            keys.append(f"TRY_STRPTIME(\"{column}\", '{DATE_TEXT_FORMAT}')")
+        else:
+            keys.append(f'"{column}"')
+    if keys:
+        conn.execute(
+            f"CREATE OR REPLACE TABLE {table_name} AS "
+            f"SELECT * FROM {table_name} ORDER BY {', '.join(keys)}"
+        )
+
+
+def _create_indexes(conn: duckdb.DuckDBPyConnection, table_name: str) -> None:
+    """Build ART indexes on the table's TABLE_INDEXES columns for point lookups."""
+    columns = _table_columns(conn, table_name)
+    for column in TABLE_INDEXES.get(table_name, []):
+        if column in columns:
+            conn.execute(
+                f'CREATE INDEX IF NOT EXISTS "{table_name}_{column}_idx" ON {table_name} ("{column}")'
+            )
+
+
+def _sample_lookups(conn: duckdb.DuckDBPyConnection, table_name: str) -> dict[str, str]:
+    """One equality lookup per indexed column, on a value from the middle of the table."""
+    columns = _table_columns(conn, table_name)
+    indexed = [c for c in TABLE_INDEXES.get(table_name, []) if c in columns]
+    if not indexed:
+        return {}
+    n_rows = conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+    lookups = {}
+    for column in indexed:
+        row = conn.execute(
+            f'SELECT "{column}" FROM {table_name} WHERE "{column}" IS NOT NULL '
+            f"LIMIT 1 OFFSET {n_rows // 2}"
+        ).fetchone()
+        if row is not None:
+            literal = str(row[0]).replace("'", "''")
+            lookups[column] = f"SELECT * FROM {table_name} WHERE \"{column}\" = '{literal}'"
+    return lookups
+
+
+def _time_lookup(conn: duckdb.DuckDBPyConnection, sql: str, runs: int = 5) -> float:
+    """Median latency of a query in milliseconds."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        conn.execute(sql).fetchall()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def _encode_low_cardinality(conn: duckdb.DuckDBPyConnection, table_name: str) -> None:
+    """
+    Convert low-cardinality VARCHAR columns to ENUM types (dictionary encoding).
+    A column qualifies if it has at most ENUM_MAX_CARDINALITY distinct values
+    and repeats each value at least twice on average.
+    """
+    varchar_cols = [
+        name for name, dtype, *_ in conn.execute(f"DESCRIBE {table_name}").fetchall()
+        if dtype == "VARCHAR"
+    ]
+    if not varchar_cols:
+        return
+    counts = conn.execute(
+        f"SELECT COUNT(*), "
+        + ", ".join(f'COUNT(DISTINCT "{col}")' for col in varchar_cols)
+        + f" FROM {table_name}"
+    ).fetchone()
+    n_rows, distinct = counts[0], counts[1:]
+    for col, n_distinct in zip(varchar_cols, distinct):
+        if 0 < n_distinct <= ENUM_MAX_CARDINALITY and n_distinct * 2 <= n_rows:
+            enum_type = f'"{table_name}_{col}_enum"'
+            conn.execute(f"DROP TYPE IF EXISTS {enum_type}")
+            conn.execute(
+                f'CREATE TYPE {enum_type} AS ENUM '
+                f'(SELECT DISTINCT "{col}" FROM {table_name} WHERE "{col}" IS NOT NULL ORDER BY 1)'
+            )
+            conn.execute(f'ALTER TABLE {table_name} ALTER "{col}" TYPE {enum_type}')
+
+
+def _quote(value: str) -> str:
+    return value.replace("'", "''")
+
+
+def _date_columns(conn: duckdb.DuckDBPyConnection, reader: str) -> list[str]:
+    """
+    Columns of a multi-file read that hold dates, to be read as text like the pandas path.
+    The sniffer guesses date formats per file, so a file of only day <= 12 dates
+    (04-01-22 … 04-12-22) would otherwise parse as %y-%m-%d.
+    """
+    described = conn.execute(f"DESCRIBE SELECT * FROM {reader}").fetchall()
+    return [
+        name for name, dtype, *_ in described
+        if "date" in _clean_column_name(name) or dtype in ("DATE", "TIMESTAMP", "TIME")
+    ]
+
+
+def _ingest_files(conn: duckdb.DuckDBPyConnection, table_name: str, files: list[Path]) -> str:
+    """
+    Ingest many CSVs into one native table with DuckDB's multi-threaded reader.
+    Columns are unioned by name across files and each row records its `source_file`.
+    Returns the table's schema description.
+    """
+    start = time.perf_counter()
+    before = _memory_usage(conn)
+    file_list = ", ".join(f"'{_quote(str(f))}'" for f in files)
+    reader = f"read_csv([{file_list}], union_by_name = true, encoding = '{CSV_ENCODING}'"
+    text_dates = _date_columns(conn, reader + ")")
+    if text_dates:
+        reader += ", types = {" + ", ".join(f"'{_quote(c)}': 'VARCHAR'" for c in text_dates) + "}"
+    conn.execute(
+        f"CREATE OR REPLACE TABLE {table_name} AS "
+        f"SELECT * EXCLUDE (filename), parse_filename(filename) AS source_file "
+        f"FROM {reader}, filename = true)"
+    )
+    columns = [row[0] for row in conn.execute(f"DESCRIBE {table_name}").fetchall()]
+    for column in columns:
+        cleaned = _clean_column_name(column)
+        if cleaned != column:
+            conn.execute(f'ALTER TABLE {table_name} RENAME COLUMN "{column}" TO "{cleaned}"')
+    for column in map(_clean_column_name, text_dates):
+        unparsed = conn.execute(
+            f'SELECT COUNT(*) FROM {table_name} WHERE "{column}" IS NOT NULL '
+            f"AND TRY_STRPTIME(\"{column}\", '{DATE_TEXT_FORMAT}') IS NULL"
+        ).fetchone()[0]
+        if unparsed:
+            print(f"[loader] Warning: {unparsed} values of {table_name}.{column} don't match {DATE_TEXT_FORMAT}")
+    _finalize_native_table(conn, table_name, before)
+
+    elapsed = time.perf_counter() - start
+    n_rows = conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+    print(
+        f"[loader] Ingested '{table_name}' — {n_rows} rows, {len(columns)} cols "
+        f"from {len(files)} files in {elapsed:.2f}s ({n_rows / max(elapsed, 1e-9):,.0f} rows/s), "
+        f"{_state.table_memory[table_name] / 1e6:.1f} MB resident"
+    )
+    return _describe_table(conn, table_name)
+
+
+def _short_type(dtype: str) -> str:
+    """Keep ENUM types readable in the prompt: list values only for small enums."""
+    if dtype.startswith("ENUM(") and dtype.count("', '") >= 12:
+        return f"ENUM of {dtype.count(chr(39) + ', ' + chr(39)) + 1} values"
+    return dtype
+
+
+def _describe_table(conn: duckdb.DuckDBPyConnection, table_name: str) -> str:
+    """Build the schema description of a native DuckDB table."""
+    described = conn.execute(f"DESCRIBE {table_name}").fetchall()
+    col_info = ", ".join(f"{name} ({_short_type(dtype)})" for name, dtype, *_ in described)
+    sample = conn.execute(f"SELECT * FROM {table_name} LIMIT 2").fetchdf().to_dict(orient="records")
+    return (
+        f"Table: {table_name}\n"
+        f"  Columns: {col_info}\n"
+        f"  Sample rows: {sample}\n"
+    )
+
+
+def _compute_table_stats(conn: duckdb.DuckDBPyConnection) -> dict[str, dict]:
+    """
+    Precompute row counts and positive metric totals for every loaded table.
+    One aggregate scan per table; used by the validation agent as cheap upper bounds.
+    """
+    stats = {}
+    loaded = {row[0] for row in conn.execute("SHOW TABLES").fetchall()}
+    for table_name in DATASETS:
+        if table_name not in loaded:
+            continue
+        columns = {d[0] for d in conn.execute(f"SELECT * FROM {table_name} LIMIT 0").description}
+        metrics = {
+            col: kind for col, kind in METRIC_COLUMNS.get(table_name, {}).items() if col in columns
+        }
+        exprs = ["COUNT(*)"] + [
+            f"SUM(GREATEST(TRY_CAST({col} AS DOUBLE), 0))" for col in metrics
+        ]
+        try:
+            row = conn.execute(f"SELECT {', '.join(exprs)} FROM {table_name}").fetchone()
+        except duckdb.Error as e:
+            print(f"[loader] WARNING: could not compute stats for '{table_name}': {e}")
+            continue
+        totals: dict[str, float] = {}
+        for kind, value in zip(metrics.values(), row[1:]):
+            totals[kind] = totals.get(kind, 0.0) + (value or 0.0)
+        stats[table_name] = {"row_count": row[0], "totals": totals}
+    return stats
 
 
 def get_schema_info() -> str:
@@ -72,11 +398,68 @@ def get_schema_info() -> str:
     return _state.schema_info
 
 
-def execute_query(sql: str) -> pd.DataFrame:
-    """Execute a SQL query and return results as a DataFrame."""
-    conn = get_connection()
+def get_table_stats() -> dict[str, dict]:
+    """
+    Return precomputed per-table aggregates:
+    {table: {"row_count": int, "totals": {metric_kind: float}}}.
+    """
+    if _state.conn is None:
+        get_connection()  # ensure loaded
+    return _state.table_stats
+
+
+def get_table_memory() -> dict[str, int]:
+    """Return the approximate resident bytes held by each loaded table."""
+    if _state.conn is None:
+        get_connection()  # ensure loaded
+    return _state.table_memory
+
+
+def get_lookup_latency() -> dict[str, dict[str, float]]:
+    """Return point-lookup latency per indexed `table.column`, before and after indexing."""
+    if _state.conn is None:
+        get_connection()  # ensure loaded
+    return _state.lookup_latency
+
+
+def get_cursor() -> duckdb.DuckDBPyConnection:
+    """
+    Return a new cursor on the shared database, for running queries in parallel.
+    Registered DataFrame views are connection-local, so they are re-registered here.
+    """
+    cursor = get_connection().cursor()
+    for table_name, df in _state.frames.items():
+        cursor.register(table_name, df)
+    return cursor
+
+
+def execute_query(
+    sql: str,
+    conn: duckdb.DuckDBPyConnection | None = None,
+    question: str | None = None,
+    as_arrow: bool = False,
+    cursor_factory: Callable[[], duckdb.DuckDBPyConnection] | None = None,
+) -> pd.DataFrame | pa.Table:
+    """
+    Execute a SQL query and return results as a DataFrame (or an Arrow table if `as_arrow`).
+    Runs on the shared connection unless a cursor from `get_cursor` is given.
+    Queries over the slow-query threshold are logged with the originating question and
+    profiled on a cursor from `cursor_factory` (default `get_cursor`); pass one that
+    registers the same views as `conn`, e.g. a session's `last_result`.
+    """
+    conn = conn or get_connection()
     try:
-        result = conn.execute(sql).fetchdf()
+        start = time.perf_counter()
+        relation = conn.execute(sql)
+        if as_arrow:
+            # DuckDB 1.5 renamed fetch_arrow_table() to to_arrow_table()
+            fetch = getattr(relation, "to_arrow_table", None) or relation.fetch_arrow_table
+            result = fetch()
+        else:
+            result = relation.fetchdf()
+        record_query(
+            sql, time.perf_counter() - start, len(result), question, cursor_factory or get_cursor
+        )
         return result
     except duckdb.Error as e:
         raise ValueError(f"SQL execution error: {e}") from e
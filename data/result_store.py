@@ -0,0 +1,141 @@
+"""
+Process-local store for query results held as Arrow tables.
+Pipeline state references results by handle plus schema/row-count metadata, so it
+stays small and serializable. Entries are freed when their reference count drops
+to zero, or after RESULT_STORE_TTL_S without access if a reference is leaked.
+"""
+import threading
+import time
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+
+from config import RESULT_STORE_TTL_S
+from monitoring.metrics import metrics
+
+
+class _Entry:
+    """A stored result with its reference count and last access time."""
+
+    def __init__(self, table: pa.Table):
+        self.table = table
+        self.refs = 1
+        self.pinned = False
+        self.last_access = time.monotonic()
+
+
+class _ResultStore:
+    """Thread-safe handle → Arrow table map with refcounting and TTL expiry."""
+
+    def __init__(self, ttl_s: float):
+        self._ttl_s = ttl_s
+        self._lock = threading.Lock()
+        self._entries: dict[str, _Entry] = {}
+
+    def _sweep(self) -> None:
+        cutoff = time.monotonic() - self._ttl_s
+        expired = [
+            h for h, e in self._entries.items() if not e.pinned and e.last_access < cutoff
+        ]
+        for handle in expired:
+            del self._entries[handle]
+        if expired:
+            metrics.incr("result_store.expired", len(expired))
+
+    def put(self, table: pa.Table) -> str:
+        with self._lock:
+            self._sweep()
+            handle = uuid.uuid4().hex
+            self._entries[handle] = _Entry(table)
+            return handle
+
+    def get(self, handle: str) -> pa.Table | None:
+        with self._lock:
+            entry = self._entries.get(handle)
+            if entry is None:
+                return None
+            entry.last_access = time.monotonic()
+            return entry.table
+
+    def retain(self, handle: str) -> None:
+        with self._lock:
+            if handle in self._entries:
+                self._entries[handle].refs += 1
+
+    def release(self, handle: str) -> None:
+        with self._lock:
+            entry = self._entries.get(handle)
+            if entry is None:
+                return
+            entry.refs -= 1
+            if entry.refs <= 0 and not entry.pinned:
+                del self._entries[handle]
+
+    def pin(self, handle: str) -> None:
+        with self._lock:
+            if handle in self._entries:
+                self._entries[handle].pinned = True
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._sweep()
+            return {
+                "entries": len(self._entries),
+                "bytes": sum(e.table.nbytes for e in self._entries.values()),
+            }
+
+
+_store = _ResultStore(RESULT_STORE_TTL_S)
+
+
+def put_result(table: pa.Table) -> str:
+    """Store a result and return its handle, holding one reference for the caller."""
+    return _store.put(table)
+
+
+def get_result(handle: str | None) -> pa.Table | None:
+    """Return the stored result for a handle, or None if it was freed or expired."""
+    return _store.get(handle) if handle else None
+
+
+def retain_result(handle: str | None) -> None:
+    """Take an additional reference to a stored result."""
+    if handle:
+        _store.retain(handle)
+
+
+def release_result(handle: str | None) -> None:
+    """Drop one reference; the result is freed when none remain (unless pinned)."""
+    if handle:
+        _store.release(handle)
+
+
+def pin_result(handle: str | None) -> None:
+    """Keep a result for the life of the process, exempt from release and TTL."""
+    if handle:
+        _store.pin(handle)
+
+
+def describe_result(table: pa.Table) -> dict:
+    """Row count and column → type schema of a result, for pipeline state."""
+    return {
+        "result_rows": table.num_rows,
+        "result_schema": {field.name: str(field.type) for field in table.schema},
+    }
+
+
+def result_frame(table: pa.Table) -> pd.DataFrame:
+    """
+    Materialize a result as a DataFrame. Decimal columns (e.g. SUM over an integer
+    column) become float64, as with fetchdf(), instead of object-dtype Decimals.
+    """
+    for i, field in enumerate(table.schema):
+        if pa.types.is_decimal(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(pa.float64()))
+    return table.to_pandas()
+
+
+def result_store_stats() -> dict:
+    """Return the number of live results and the bytes they hold."""
+    return _store.stats()
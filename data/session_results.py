@@ -0,0 +1,109 @@
+"""
+Per-session previous results for follow-up questions.
+Each chat session's latest answer is kept in the result store and exposed to its
+queries as the `last_result` view, so refinements ("now just for Maharashtra",
+"break that down by size") can run over that result instead of the base tables.
+Sessions are bounded: one result each, expired after LAST_RESULT_TTL_S idle, and
+at most LAST_RESULT_MAX_SESSIONS kept (least recently used evicted first).
+"""
+import threading
+import time
+from collections import OrderedDict
+
+import duckdb
+
+from config import LAST_RESULT_MAX_ROWS, LAST_RESULT_MAX_SESSIONS, LAST_RESULT_TTL_S
+from data.loader import get_cursor
+from data.result_store import describe_result, get_result, release_result, retain_result
+
+LAST_RESULT_VIEW = "last_result"
+
+
+class _SessionResult:
+    """The latest result of one session and what produced it."""
+
+    def __init__(self, handle: str, question: str, sql: str, meta: dict):
+        self.handle = handle
+        self.question = question
+        self.sql = sql
+        self.rows = meta["result_rows"]
+        self.schema = meta["result_schema"]
+        self.last_access = time.monotonic()
+
+
+_lock = threading.Lock()
+_sessions: OrderedDict[str, _SessionResult] = OrderedDict()
+
+
+def _drop(session_id: str) -> None:
+    entry = _sessions.pop(session_id, None)
+    if entry is not None:
+        release_result(entry.handle)
+
+
+def _live_entry(session_id: str) -> _SessionResult | None:
+    """Return the session's entry if it hasn't expired, refreshing its access time."""
+    entry = _sessions.get(session_id)
+    if entry is None:
+        return None
+    if time.monotonic() - entry.last_access > LAST_RESULT_TTL_S or get_result(entry.handle) is None:
+        _drop(session_id)
+        return None
+    entry.last_access = time.monotonic()
+    _sessions.move_to_end(session_id)
+    return entry
+
+
+def set_last_result(session_id: str, handle: str | None, question: str, sql: str) -> bool:
+    """
+    Keep a result as the session's `last_result`, replacing the previous one.
+    Results over LAST_RESULT_MAX_ROWS are not kept. Returns True if the result was kept.
+    """
+    table = get_result(handle)
+    if not session_id or table is None or table.num_rows > LAST_RESULT_MAX_ROWS:
+        return False
+    retain_result(handle)
+    with _lock:
+        _drop(session_id)
+        _sessions[session_id] = _SessionResult(handle, question, sql, describe_result(table))
+        while len(_sessions) > LAST_RESULT_MAX_SESSIONS:
+            _drop(next(iter(_sessions)))
+    return True
+
+
+def get_last_result(session_id: str | None) -> dict | None:
+    """Return the question, SQL, row count and schema of the session's last result, if live."""
+    if not session_id:
+        return None
+    with _lock:
+        entry = _live_entry(session_id)
+        if entry is None:
+            return None
+        return {
+            "question": entry.question,
+            "sql": entry.sql,
+            "rows": entry.rows,
+            "schema": dict(entry.schema),
+        }
+
+
+def clear_last_result(session_id: str | None) -> None:
+    """Forget the session's last result."""
+    with _lock:
+        _drop(session_id)
+
+
+def open_session_cursor(session_id: str | None) -> duckdb.DuckDBPyConnection:
+    """
+    Return a new cursor with the session's last result registered as `last_result`.
+    Registered views are connection-local, so sessions never see each other's results.
+    The caller closes the cursor.
+    """
+    cursor = get_cursor()
+    if session_id:
+        with _lock:
+            entry = _live_entry(session_id)
+            table = get_result(entry.handle) if entry is not None else None
+        if table is not None:
+            cursor.register(LAST_RESULT_VIEW, table)
+    return cursor
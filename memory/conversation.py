@@ -1,9 +1,12 @@
 """
 Conversation memory management using a simple windowed buffer.
 Stores (role, content) pairs and formats them for prompt injection.
+Each memory is one chat session; its latest result stays queryable as `last_result`.
 """
+import uuid
 from collections import deque
 from config import MEMORY_WINDOW
+from data.session_results import LAST_RESULT_VIEW, clear_last_result, get_last_result
 
 
 class ConversationMemory:
@@ -11,6 +14,7 @@ class ConversationMemory:
 
     def __init__(self, window: int = MEMORY_WINDOW):
         self._history: deque[dict] = deque(maxlen=window * 2)  # *2 for user+assistant pairs
+        self.session_id = uuid.uuid4().hex
 
     def add_user(self, message: str) -> None:
         """Append a user message to the conversation history."""
@@ -22,12 +26,18 @@ class ConversationMemory:
 
     def get_formatted(self) -> str:
         """Return conversation history as a formatted string for prompt injection."""
-        if not self._history:
+        last = get_last_result(self.session_id)
+        if not self._history and last is None:
             return "No previous conversation."
         lines = []
         for turn in self._history:
             role = "User" if turn["role"] == "user" else "Assistant"
             lines.append(f"{role}: {turn['content']}")
+        if last is not None:
+            lines.append(
+                f"(The result of \"{last['question']}\" is saved as table `{LAST_RESULT_VIEW}`: "
+                f"{last['rows']} rows; columns {', '.join(last['schema'])}.)"
+            )
         return "\n".join(lines)
 
     def get_messages(self) -> list[dict]:
@@ -35,5 +45,6 @@ class ConversationMemory:
         return list(self._history)
 
     def clear(self) -> None:
-        """Clear all messages from the conversation history."""
+        """Clear all messages from the conversation history and the session's last result."""
         self._history.clear()
+        clear_last_result(self.session_id)
@@ -0,0 +1,84 @@
+"""
+Process-wide pipeline metrics: named counters and bounded latency windows.
+Thread-safe, so agents running in worker threads can record into it.
+"""
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from statistics import mean
+
+from config import METRICS_WINDOW
+
+
+class _Metrics:
+    """Holds counters and recent latency samples behind a single lock."""
+
+    def __init__(self, window: int = METRICS_WINDOW):
+        self._lock = threading.Lock()
+        self._window = window
+        self._counters: Counter[str] = Counter()
+        self._latencies: dict[str, deque[float]] = {}
+
+    def incr(self, name: str, n: int = 1) -> None:
+        """Increment counter `name` by `n`."""
+        with self._lock:
+            self._counters[name] += n
+
+    def observe(self, name: str, seconds: float) -> None:
+        """Record a latency sample (in seconds) for `name`."""
+        with self._lock:
+            self._latencies.setdefault(name, deque(maxlen=self._window)).append(seconds)
+
+    def counter(self, name: str) -> int:
+        """Return the current value of counter `name`."""
+        with self._lock:
+            return self._counters[name]
+
+    def counters(self, prefix: str = "") -> dict[str, int]:
+        """Return all counters whose names start with `prefix`."""
+        with self._lock:
+            return {k: v for k, v in self._counters.items() if k.startswith(prefix)}
+
+    def latency(self, name: str) -> dict[str, float]:
+        """Return count, mean, p50 and p95 (ms) over the recent samples for `name`."""
+        with self._lock:
+            samples = sorted(self._latencies.get(name, ()))
+        if not samples:
+            return {"count": 0, "mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0}
+        return {
+            "count": len(samples),
+            "mean_ms": mean(samples) * 1000,
+            "p50_ms": samples[len(samples) // 2] * 1000,
+            "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000,
+        }
+
+    def latency_names(self, prefix: str = "") -> list[str]:
+        """Return the names of latency series starting with `prefix`."""
+        with self._lock:
+            return sorted(k for k in self._latencies if k.startswith(prefix))
+
+    def reset(self) -> None:
+        """Clear all counters and latency samples."""
+        with self._lock:
+            self._counters.clear()
+            self._latencies.clear()
+
+
+metrics = _Metrics()
+
+
+@contextmanager
+def timed(name: str):
+    """Context manager that records the wrapped block's wall time under `name`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.observe(name, time.perf_counter() - start)
+
+
+def rate(numerator: str, denominator: str) -> float:
+    """Return counter(numerator) / counter(denominator), or 0.0 when nothing was counted."""
+    total = metrics.counter(denominator)
+    return metrics.counter(numerator) / total if total else 0.0
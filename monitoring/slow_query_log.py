@@ -0,0 +1,143 @@
+"""
+Slow-query log: queries over SLOW_QUERY_THRESHOLD_MS are kept in a bounded,
+persistent JSONL log with their originating question. When profiling is enabled,
+an EXPLAIN ANALYZE profile (operator timings, rows scanned) is captured in the
+background so the user's request isn't slowed down further.
+"""
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+import duckdb
+
+from config import (
+    SLOW_QUERY_LOG_MAX,
+    SLOW_QUERY_LOG_PATH,
+    SLOW_QUERY_PROFILE,
+    SLOW_QUERY_THRESHOLD_MS,
+)
+from monitoring.metrics import metrics
+
+
+class _SlowQueryLog:
+    """Bounded in-memory log mirrored to a JSONL file."""
+
+    def __init__(self, path, max_entries: int):
+        self._path = path
+        self._lock = threading.Lock()
+        self._entries: deque[dict] = deque(maxlen=max_entries)
+        self._loaded = False
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            with open(self._path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        self._entries.append(json.loads(line))
+        except (OSError, json.JSONDecodeError) as e:
+            if not isinstance(e, FileNotFoundError):
+                print(f"[slow_query_log] WARNING: could not read {self._path}: {e}")
+
+    def _persist(self) -> None:
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self._path, "w", encoding="utf-8") as f:
+                for entry in self._entries:
+                    f.write(json.dumps(entry, default=str, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"[slow_query_log] WARNING: could not write {self._path}: {e}")
+
+    def add(self, entry: dict) -> None:
+        """Append an entry, evicting the oldest beyond the bound, and persist."""
+        with self._lock:
+            self._ensure_loaded()
+            self._entries.append(entry)
+            self._persist()
+
+    def update(self, entry_id: str, **fields) -> None:
+        """Attach fields (e.g. a finished profile) to an existing entry and persist."""
+        with self._lock:
+            for entry in self._entries:
+                if entry["id"] == entry_id:
+                    entry.update(fields)
+                    self._persist()
+                    return
+
+    def entries(self) -> list[dict]:
+        """Return all retained entries, oldest first."""
+        with self._lock:
+            self._ensure_loaded()
+            return [dict(e) for e in self._entries]
+
+    def clear(self) -> None:
+        """Drop all entries and truncate the file."""
+        with self._lock:
+            self._entries.clear()
+            self._loaded = True
+            self._persist()
+
+
+_log = _SlowQueryLog(SLOW_QUERY_LOG_PATH, SLOW_QUERY_LOG_MAX)
+_profiler = ThreadPoolExecutor(max_workers=1, thread_name_prefix="query-profiler")
+_profiler_busy = threading.Semaphore(1)
+
+
+def _profile(entry_id: str, sql: str, cursor_factory: Callable[[], duckdb.DuckDBPyConnection]) -> None:
+    try:
+        cursor = cursor_factory()
+        try:
+            rows = cursor.execute(f"EXPLAIN ANALYZE {sql}").fetchall()
+        finally:
+            cursor.close()
+        profile = "\n".join(str(row[-1]) for row in rows)
+    except duckdb.Error as e:
+        profile = f"Profiling failed: {e}"
+    finally:
+        _profiler_busy.release()
+    _log.update(entry_id, profile=profile)
+
+
+def record_query(
+    sql: str,
+    elapsed: float,
+    rows: int,
+    question: str | None,
+    cursor_factory: Callable[[], duckdb.DuckDBPyConnection],
+) -> None:
+    """
+    Record a query's latency; log it if it exceeds the slow-query threshold.
+    `cursor_factory` supplies a fresh cursor for the background EXPLAIN ANALYZE run.
+    """
+    metrics.observe("query.latency", elapsed)
+    if elapsed * 1000 < SLOW_QUERY_THRESHOLD_MS:
+        return
+    metrics.incr("query.slow")
+    entry_id = f"{time.time():.6f}-{threading.get_ident()}"
+    _log.add({
+        "id": entry_id,
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "question": question or "",
+        "sql": sql,
+        "latency_ms": round(elapsed * 1000, 1),
+        "rows": rows,
+        "profile": "",
+    })
+    # Profile at most one query at a time; skip rather than queue under load.
+    if SLOW_QUERY_PROFILE and _profiler_busy.acquire(blocking=False):
+        _profiler.submit(_profile, entry_id, sql, cursor_factory)
+
+
+def get_slow_queries(limit: int = 20) -> list[dict]:
+    """Return the slowest logged queries, slowest first."""
+    return sorted(_log.entries(), key=lambda e: e["latency_ms"], reverse=True)[:limit]
+
+
+def clear_slow_queries() -> None:
+    """Empty the slow-query log."""
+    _log.clear()
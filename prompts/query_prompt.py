@@ -7,7 +7,7 @@ Your job is to convert a user's natural language question into a valid DuckDB SQ
 
 ## Available Tables & Schema
 {schema}
-
+{last_result}
 ## Rules
 1. Output ONLY the raw SQL query — no markdown, no code fences, no explanation.
 2. Always use the exact table and column names provided in the schema above.
@@ -17,6 +17,7 @@ Your job is to convert a user's natural language question into a valid DuckDB SQ
 6. If the question cannot be answered with the available data, output: SELECT 'CANNOT_ANSWER' AS reason
 7. For date filtering, the `date` column in `amazon_sales` is in DD-MM-YY format; use TRY_CAST or strptime carefully.
 8. Always handle NULL values gracefully (use COALESCE or IS NOT NULL filters where appropriate).
+9. For a specific order ID or SKU, compare the column directly (`order_id = '405-…'`, `sku = 'JNE3781-KR-XXXL'`) rather than wrapping it in LOWER/TRIM, so the lookup can use the column's index.
 
 ## Few-Shot Examples
 Q: Which category had the highest total sales?
@@ -55,3 +56,18 @@ Please fix the SQL query. Remember:
 - Available tables: {table_names}
 
 Fixed SQL Query:"""
+
+
+LAST_RESULT_SECTION = """
+## Previous Result (table `last_result`)
+The answer to the previous question is available as the table `last_result`.
+Previous question: {question}
+Previous SQL: {sql}
+Rows: {rows}
+Columns: {columns}
+
+For follow-ups that refine the previous answer (filter it, re-sort it, take the top N, re-aggregate
+its columns), query `last_result` instead of the base tables. If the follow-up needs columns that
+`last_result` does not have (e.g. a new breakdown dimension), query the base tables and carry over
+the previous question's filters.
+"""
@@ -12,6 +12,8 @@ into clear, concise, and actionable business insights for executives and analyst
 - Use bullet points for multiple findings.
 - Keep the response under 200 words unless the data warrants more detail.
 - If the data shows a trend, highlight it explicitly.
+- Quote the precomputed totals, shares, ranks and deltas as given; do not recompute them.
+- If rows were omitted, rely on the aggregates for statements about the full result.
 - End with a brief actionable recommendation when appropriate.
 
 ## Conversation History
@@ -20,7 +22,7 @@ into clear, concise, and actionable business insights for executives and analyst
 ## User Question
 {question}
 
-## Query Results (as JSON)
+## Query Results (columnar digest with precomputed statistics)
 {results}
 
 ## Your Insight:"""